@@ -0,0 +1,20 @@
+# helpers shared by the scripts of both evaluations. The scripts are run from their own folders and add the folder of
+# this file to sys.path before importing it
+
+
+def apply_settings(module_globals, names, config):
+    # overrides the settings of a script (its module-level variables listed in names), returns their previous values
+    unknown = set(config) - set(names)
+    if unknown:
+        raise ValueError(f"unknown settings: {', '.join(sorted(unknown))}")
+
+    previous = {name: module_globals[name] for name in config}
+    module_globals.update(config)
+    return previous
+
+
+def parse_path(path):
+    # type, depth and deviation probability of a difference graph as logged in a result file, e.g.
+    # evaluation_data/low/out_2/graph_0.json
+    details = path.split("/")
+    return details[1], int(details[2].split("_")[1]), int(details[3][6:].split('.')[0])
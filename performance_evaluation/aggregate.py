@@ -0,0 +1,182 @@
+import os
+import sys
+import time
+import math
+from bisect import bisect_right
+
+# common.py is located in the root folder of the repository
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+import common
+
+# result files written by runner.py per variant of difference graphs, followed while the benchmark is running
+result_files = {'broad': 'result.txt'}
+
+# live summary per strategy, variant, type, depth and deviation, rewritten after new runs were logged
+summary_file = 'live_summary.csv'
+
+# keep following the result files (until interrupted), False aggregates them once
+follow = True
+interval = 10  # seconds between checks for new runs
+
+quantiles = [0.5, 0.95]
+
+SETTINGS = ['result_files', 'summary_file', 'follow', 'interval', 'quantiles']
+
+
+def aggregate(config=None):
+    # aggregates the result files with the settings above, overridden by the ones in config (e.g. {'result_files':
+    # {'deep': 'deep.txt'}, 'follow': False}). Settings are restored afterwards, also if following is interrupted
+    previous = apply_settings(config or {})
+    try:
+        run()
+    finally:
+        apply_settings(previous)
+
+
+def apply_settings(config):
+    return common.apply_settings(globals(), SETTINGS, config)
+
+
+class RunningStats:
+    # count, mean and variance (Welford) and streaming quantiles in constant memory per configuration
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.quantiles = [P2Quantile(p) for p in quantiles]
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        for quantile in self.quantiles:
+            quantile.add(value)
+
+    def std(self):
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+
+class P2Quantile:
+    # P-square estimate of a single quantile using five markers (Jain and Chlamtac, 1985), exact for up to five values
+
+    def __init__(self, p):
+        self.p = p
+        self.heights = []
+        self.positions = [1, 2, 3, 4, 5]
+        self.desired = [1, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5]
+        self.increments = [0, p / 2, p, (1 + p) / 2, 1]
+
+    def add(self, value):
+        heights = self.heights
+        if len(heights) < 5:
+            heights.insert(bisect_right(heights, value), value)
+            return
+
+        if value < heights[0]:
+            heights[0] = value
+            k = 0
+        elif value >= heights[4]:
+            heights[4] = value
+            k = 3
+        else:
+            k = bisect_right(heights, value) - 1
+
+        for i in range(k + 1, 5):
+            self.positions[i] += 1
+        for i in range(0, 5):
+            self.desired[i] += self.increments[i]
+
+        # move the inner markers towards their desired positions
+        positions = self.positions
+        for i in range(1, 4):
+            offset = self.desired[i] - positions[i]
+            if (offset >= 1 and positions[i + 1] - positions[i] > 1) or (offset <= -1 and positions[i - 1] - positions[i] < -1):
+                step = 1 if offset > 0 else -1
+                height = self.parabolic(i, step)
+                if not heights[i - 1] < height < heights[i + 1]:
+                    height = heights[i] + step * (heights[i + step] - heights[i]) / (positions[i + step] - positions[i])
+                heights[i] = height
+                positions[i] += step
+
+    def parabolic(self, i, step):
+        heights, positions = self.heights, self.positions
+        return heights[i] + step / (positions[i + 1] - positions[i - 1]) * (
+            (positions[i] - positions[i - 1] + step) * (heights[i + 1] - heights[i]) / (positions[i + 1] - positions[i]) +
+            (positions[i + 1] - positions[i] - step) * (heights[i] - heights[i - 1]) / (positions[i] - positions[i - 1]))
+
+    def value(self):
+        if len(self.heights) < 5:
+            return self.heights[max(0, math.ceil(self.p * len(self.heights)) - 1)]
+        return self.heights[2]
+
+
+def read_new_runs(variant, path, offset, stats):
+    # only complete lines are aggregated, a line runner.py is still writing is read on the next check
+    with open(path, "rb") as file:
+        file.seek(offset)
+        for line in file:
+            if not line.endswith(b"\n"):
+                break
+            offset += len(line)
+
+            # strategyID, endTime, algorithmStartTime, algorithmDuration, startTime, setupDuration, duration, path, ...
+            content = line.decode().split(",")
+            key = (int(content[0]), variant) + common.parse_path(content[7])
+            if key not in stats:
+                stats[key] = RunningStats()
+            stats[key].add(float(content[3]))
+    return offset
+
+
+def write_summary(stats):
+    with open(f"{summary_file}.tmp", "w") as file:
+        file.write("strategyID,variation,frequency,depth,deviation,runs,mean,std,min,"
+                   + ",".join(f"q{round(p * 100)}" for p in quantiles) + ",max\n")
+        for key in sorted(stats):
+            entry = stats[key]
+            file.write(",".join(str(value) for value in key) + f",{entry.count},{entry.mean:.3f},{entry.std():.3f},{entry.min:g},"
+                       + ",".join(f"{quantile.value():.3f}" for quantile in entry.quantiles) + f",{entry.max:g}\n")
+    # replaced at once, readers never see a partially written summary
+    os.replace(f"{summary_file}.tmp", summary_file)
+
+
+def run():
+    stats = {}
+    offsets = {path: 0 for path in result_files.values()}
+
+    while True:
+        updated = False
+        for variant, path in result_files.items():
+            if not os.path.exists(path):
+                continue
+            if os.path.getsize(path) < offsets[path]:
+                # result file was replaced, start over with this variant
+                print(f"'{path}' was truncated, aggregating it again", flush=True)
+                stats = {key: entry for key, entry in stats.items() if key[1] != variant}
+                offsets[path] = 0
+
+            offset = read_new_runs(variant, path, offsets[path], stats)
+            updated = updated or offset != offsets[path]
+            offsets[path] = offset
+
+        if updated:
+            write_summary(stats)
+            print(f"{sum(entry.count for entry in stats.values())} runs in {len(stats)} configurations aggregated", flush=True)
+        if not follow:
+            break
+        time.sleep(interval)
+
+
+if __name__ == '__main__':
+    try:
+        aggregate()
+    except KeyboardInterrupt:
+        print("Aggregation stopped")
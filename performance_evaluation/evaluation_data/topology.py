@@ -2,7 +2,30 @@ import random
 import math
 import json
 import os
+import gzip
+import hashlib
+import shutil
+import mmap
+import sys
+import time
+import tracemalloc
+from array import array
+from itertools import chain
+from bisect import bisect_right
+from functools import lru_cache
 from enum import Enum
+from multiprocessing import Pool
+
+# common.py is located in the root folder of the repository
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+import common
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 # parameters for creation of tree structures, how many successors has a single node
 branch_mean = 1.5  # broad 2.5, deep 1.5
@@ -15,8 +38,20 @@ edge_std = 0.5  # broad 1.0, deep 0.5
 # how 'deep' is the original tree-like structure
 depths = [i for i in range(2, 26)]   # deep from 2 to 25, broad from 2 to 12 (all inclusive)
 
-# used for unique node labeling
-node_counter = 0
+# graph structures, every variant overrides the parameters above
+variants = {
+    'broad': {'branch_mean': 2.5, 'branch_std': 1.5, 'edge_std': 1.0, 'depths': [i for i in range(2, 13)]},
+    'deep': {'branch_mean': 1.5, 'branch_std': 0.5, 'edge_std': 0.5, 'depths': [i for i in range(2, 26)]},
+}
+
+# variants to generate (one sub folder each), an empty list generates 'depths' with the parameters above
+selected_variants = []  # e.g. ['broad', 'deep']
+
+# every graph derives its own random generator from this seed, the same seed always produces the same graphs
+seed = 2019
+
+# number of worker processes generating graphs in parallel, 1 generates all graphs in this process
+processes = 1
 
 # change type distribution in percent. Remaining percentage => unchanged
 # change_types = {'removed': 2, 'added': 2, 'updated': 2}                           # 2  2  2
@@ -31,52 +66,320 @@ deviation_probabilities = [0, 5, 10, 20, 30]
 min_deviation = 30
 max_deviation = 200
 
+# graph representation: 'objects' builds the graph of Node objects and categorises edges as sets of node tuples,
+# 'compact' records tree and connections in flat integer arrays right away (CompactGraph) and only creates nodes for
+# the output, meant for huge graphs. Both backends create the same graphs, entries are listed in a different order
+graph_backend = 'objects'
+
+# 'full' writes a complete difference graph per deviation probability, 'delta' writes the graph without deviations once
+# (graph_0) and per probability only the critical edges and their deviation (graph_{p}.delta.json)
+deviation_output = 'full'
+
+# output format of the difference graphs: 'json', 'ndjson' (one change per line) or either of them gzipped ('json.gz',
+# 'ndjson.gz'). Summaries are written as json, gzipped if the graphs are. 'bin' writes graphs and summary in a binary
+# format that is memory-mapped instead of parsed (see BinaryDocument), existing json graphs are converted by
+# 'python topology.py convert <folder>'
+output_format = 'json'
+
+# folder the output folders are created in, '' for the current working directory
+output_dir = ''
+
+# parameter sweep: the tree and its connections are generated once per depth, every combination of a change type mix
+# and a deviation setting is tagged on top of it and written to a folder of its own. Empty lists use 'change_types'
+# and the deviation settings above. Only deviation settings can be swept besides the change types: the tree
+# (branch_mean, branch_std) and its connections (edge_mean, edge_std) are built once and shared by all combinations
+sweep_change_types = []  # e.g. [{'removed': 2, 'added': 2, 'updated': 2}, {'removed': 5, 'added': 5, 'updated': 10}]
+sweep_deviations = []    # e.g. [{'min_deviation': 30, 'max_deviation': 200}, {'deviation_probabilities': [0, 50]}]
+
+# opt-in instrumentation: wall time and allocation peak of every phase of every graph (tree growth, connections,
+# graph arrays, tagging, propagation, categorisation, deviations, serialisation) together with its number of nodes and
+# edges are appended as json lines to profile_file. Allocation peaks are traced with tracemalloc (profile_memory),
+# which slows generation down considerably. '' disables profiling
+profile_file = ''
+profile_memory = True
+
+# content-addressed cache of generated graphs: every graph is written to cache_dir/<key> instead of the output folders,
+# the key hashes all settings its output depends on, the depth and the version of this script. Graphs already in the
+# cache (complete and unmodified) are not generated again. '' writes to the output folders as before
+cache_dir = ''
+# cached files are checked by their size and modification time, True also compares their sha256 hashes and reads the
+# whole cache entry on every lookup
+cache_verify = False
+
+SETTINGS = ['branch_mean', 'branch_std', 'edge_mean', 'edge_std', 'depths', 'variants', 'selected_variants', 'seed',
+            'processes', 'change_types', 'deviation_probabilities', 'min_deviation', 'max_deviation', 'graph_backend',
+            'deviation_output', 'output_format', 'output_dir', 'sweep_change_types', 'sweep_deviations', 'cache_dir',
+            'cache_verify', 'profile_file', 'profile_memory']
+DEVIATION_SETTINGS = ['deviation_probabilities', 'min_deviation', 'max_deviation']
+# settings besides the structure of a graph that change its output, part of the cache key
+OUTPUT_SETTINGS = ['change_types', 'deviation_probabilities', 'min_deviation', 'max_deviation', 'graph_backend',
+                   'deviation_output', 'output_format']
+CACHE_MANIFEST = 'cache.json'
+
+BINARY_MAGIC = b'DIFFGRPH'
+BINARY_DTYPES = {'B': '|u1', 'i': '<i4', 'q': '<i8'}
+BINARY_FORMATS = {'|u1': 'B', '<i4': 'i', '<i8': 'q'}
+
+
+def generate(config=None):
+    # generates all graphs with the settings above, overridden by the ones in config (e.g. {'selected_variants':
+    # ['deep'], 'depths': [2, 3], 'seed': 7}). Depths in config also replace the depths of all variants. Settings are
+    # restored afterwards, several configurations can be generated one after another in the same process
+    config = dict(config or {})
+    if 'depths' in config:
+        config['variants'] = {name: dict(parameters, depths=config['depths'])
+                              for name, parameters in config.get('variants', variants).items()}
+    previous = apply_settings(config)
+    try:
+        run()
+    finally:
+        apply_settings(previous)
+
+
+def apply_settings(config):
+    return common.apply_settings(globals(), SETTINGS, config)
 
-def run():
-
-    change_types['unchanged'] = sum(value for value in change_types.values())
-
-    for depth in depths:
-        # output folder
-        out_dir = f"out_{depth}_r{change_types['removed']}_a{change_types['added']}_u{change_types['updated']}"
-        construct_graph(depth, out_dir)
 
+def run():
+    for deviation in sweep_deviations:
+        unknown = set(deviation) - set(DEVIATION_SETTINGS)
+        if unknown:
+            raise ValueError(f"settings can not be swept: {', '.join(sorted(unknown))}")
+
+    jobs = []
+    for variant in selected_variants or [None]:
+        parameters = variants[variant] if variant else {}
+        for depth in parameters.get('depths', depths):
+            jobs.append((variant, depth))
+
+    if processes > 1:
+        # largest graphs first, otherwise the deepest graph is started last and keeps a single core busy at the end
+        jobs.sort(key=lambda job: get_context(job[0], job[1]).branch_mean ** job[1], reverse=True)
+        # workers start with the current settings, also if they do not inherit them from this process
+        settings = {name: globals()[name] for name in SETTINGS}
+        with Pool(processes, initializer=apply_settings, initargs=(settings,)) as pool:
+            pool.starmap(generate_graph, jobs, chunksize=1)
+    else:
+        for job in jobs:
+            generate_graph(*job)
+
+
+def get_context(variant, depth):
+    parameters = variants[variant] if variant else {}
+    return GraphContext(f"{seed}/{variant}/{depth}",
+                        branch_mean=parameters.get('branch_mean', branch_mean),
+                        branch_std=parameters.get('branch_std', branch_std),
+                        edge_mean=parameters.get('edge_mean', edge_mean),
+                        edge_std=parameters.get('edge_std', edge_std))
+
+
+def get_out_dir(variant, depth):
+    # output folder of the current settings, deviation settings only appear in the name if they are swept
+    out_dir = f"out_{depth}_r{change_types['removed']}_a{change_types['added']}_u{change_types['updated']}"
+    if sweep_deviations:
+        out_dir += f"_d{min_deviation}-{max_deviation}_p{'-'.join(str(p) for p in deviation_probabilities)}"
+    if variant:
+        out_dir = os.path.join(variant, out_dir)
+    return os.path.join(output_dir, out_dir)
+
+
+def get_overlays():
+    # settings of every combination in the sweep, a single overlay with the current settings without sweep. Overlays
+    # only change settings used after construct_topology
+    return [dict(deviation, change_types=mix) for mix in sweep_change_types or [change_types]
+            for deviation in sweep_deviations or [{}]]
+
+
+def generate_graph(variant, depth):
+    overlays = get_overlays()
+    if cache_dir:
+        overlays = [overlay for overlay in overlays if locate(variant, depth, overlay) is None]
+        if not overlays:
+            print(f"depth {depth}{f' ({variant})' if variant else ''} is cached")
+            return
+
+    context = get_context(variant, depth)
+    tracing = profile_file and profile_memory and not tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.start()
+    context.profiler = PhaseProfiler(enabled=bool(profile_file))
+    topology = construct_topology(depth, context)
+
+    # every overlay starts with the random state after the structure was built, its output is identical to a separate
+    # generation with the same settings
+    state = context.random.getstate()
+    for overlay in overlays:
+        previous = apply_settings(overlay)
+        try:
+            context.random.setstate(state)
+            topology.reset()
+            context.profiler.overlay = os.path.basename(get_out_dir(variant, depth))
+            if cache_dir:
+                settings = get_cache_settings(variant, depth)
+                # written next to the cache entry and moved at once, an interrupted generation leaves no entry behind
+                tmp_dir = os.path.join(cache_dir, f"{get_cache_key(settings)}.tmp{os.getpid()}")
+                construct_graph(depth, tmp_dir, topology, context)
+                context.profiler.phase('cache')
+                add_cache_entry(tmp_dir, settings)
+                context.profiler.phase(None)
+            else:
+                construct_graph(depth, get_out_dir(variant, depth), topology, context)
+        finally:
+            apply_settings(previous)
+
+    if profile_file:
+        graph = topology.graph
+        context.profiler.write(profile_file, variant=variant, depth=depth, nodes=len(graph.order),
+                               edges=sum(len(graph.callees(node)) for node in graph.order), backend=graph_backend,
+                               code_version=get_code_version()[:12])
+    if tracing:
+        tracemalloc.stop()
+
+
+@lru_cache(maxsize=None)
+def get_code_version():
+    # hashed once per process, the script does not change while it is running
+    with open(os.path.abspath(__file__), 'rb') as file:
+        return hashlib.sha256(file.read()).hexdigest()
+
+
+def get_cache_settings(variant, depth, overlay=None):
+    # everything the output of a graph depends on with the current settings, overridden by overlay
+    context = get_context(variant, depth)
+    settings = {name: globals()[name] for name in OUTPUT_SETTINGS}
+    settings.update(overlay or {})
+    settings.update(variant=variant, depth=depth, seed=seed, branch_mean=context.branch_mean,
+                    branch_std=context.branch_std, edge_mean=context.edge_mean, edge_std=context.edge_std,
+                    code_version=get_code_version())
+    return settings
+
+
+def get_cache_key(settings):
+    return hashlib.sha256(json.dumps(settings, sort_keys=True).encode()).hexdigest()[:20]
+
+
+def locate(variant, depth, config=None):
+    # folder of the cached graph generated with the settings above overridden by config (e.g. {'cache_dir': 'cache',
+    # 'change_types': {'removed': 2, 'added': 2, 'updated': 2}}), None if it is not cached or was modified
+    previous = apply_settings(config or {})
+    try:
+        path = os.path.join(cache_dir, get_cache_key(get_cache_settings(variant, depth)))
+        return path if verify_cache_entry(path) else None
+    finally:
+        apply_settings(previous)
+
+
+def add_cache_entry(tmp_dir, settings):
+    # renaming the folder keeps the modification times of its files
+    files = {name: get_file_digest(os.path.join(tmp_dir, name)) for name in sorted(os.listdir(tmp_dir))}
+    with open(os.path.join(tmp_dir, CACHE_MANIFEST), "w") as file:
+        json.dump({'settings': settings, 'files': files}, file, indent=1)
+
+    path = os.path.join(cache_dir, get_cache_key(settings))
+    if os.path.exists(path):
+        # incomplete or modified entry
+        shutil.rmtree(path)
+    os.rename(tmp_dir, path)
+    print(f"cached as '{path}'")
+
+
+def verify_cache_entry(path):
+    # an entry is valid if its manifest exists (written last) and all files match their size and modification time,
+    # with cache_verify also their hash
+    try:
+        with open(os.path.join(path, CACHE_MANIFEST)) as file:
+            files = json.load(file)['files']
+        for name, digest in files.items():
+            status = os.stat(os.path.join(path, name))
+            if status.st_size != digest['size'] or status.st_mtime_ns != digest['mtime']:
+                return False
+            if cache_verify and get_file_digest(os.path.join(path, name))['sha256'] != digest['sha256']:
+                return False
+        return True
+    except (OSError, ValueError, KeyError):
+        return False
+
+
+def get_file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            digest.update(chunk)
+        status = os.fstat(file.fileno())
+    return {'size': status.st_size, 'mtime': status.st_mtime_ns, 'sha256': digest.hexdigest()}
+
+
+def construct_topology(depth, context):
+    if graph_backend == 'compact':
+        return construct_compact_topology(depth, context)
 
-def construct_graph(depth, out_dir):
     # set up 'root' node of the interaction graph and target service of the experiment
-    all_nodes = set()
-    root = Node("edge", version=1, level=0)
-    target = Node("target", version=1, level=1)
+    root = Node("edge", uid=-1, version=1, level=0)
+    target = Node("target", uid=0, version=1, level=1)
     target.node_type = NodeType.UPDATED
     root.outgoing.add(target)
     target.incoming.add(root)
-    all_nodes.add(root)
-    all_nodes.add(target)
-
-    while True:
-        target.outgoing = set()
 
-        node_set = set()
-        level_dict = {}
-
-        # creates a basic tree structure, every node has random.gauss(branch_mean, branch_std) successors
-        create_child_nodes(target, depth, node_set, level_dict, max_depth=depth)
+    node_set = set()
+    level_dict = {}
 
+    context.profiler.phase('grow_tree')
+    for num_nodes in grow_tree(target, depth, node_set, level_dict, context):
         # we require that we have at least branch^depth nodes in our tree/graph
-        if len(node_set) >= branch_mean**depth:
+        if num_nodes >= context.branch_mean**depth:
             break
 
-    add_connections(target, level_dict)
+    context.profiler.phase('add_connections')
+    level_index = LevelIndex(level_dict)
+    add_connections(target, level_index, context)
     for node in node_set:
-        add_connections(node, level_dict)
+        add_connections(node, level_index, context)
+
+    # flat arrays of either backend, profiled on their own to keep their cost apart from the connections
+    context.profiler.phase('compact')
+    graph = ChangeTagger(root, target, level_index.nodes)
+    context.profiler.phase(None)
+
+    return Topology(root, target, node_set, level_dict, level_index, graph)
+
+
+def construct_compact_topology(depth, context):
+    # the same structure and random decisions as construct_topology, but tree and connections are recorded as arrays
+    # of uids while they are created. The nodes besides root and target are the uids 1 to n
+    graph = CompactGraph()
+
+    context.profiler.phase('grow_tree')
+    for num_nodes in graph.grow_tree(depth, context):
+        if num_nodes >= context.branch_mean**depth:
+            break
+
+    context.profiler.phase('add_connections')
+    level_index = LevelIndex(graph.level_dict, nodes=array('i'))
+    graph.add_connections(level_index, context)
+
+    context.profiler.phase('compact')
+    graph.build(level_index)
+    context.profiler.phase(None)
+
+    return Topology(graph.node(graph.root), graph.node(0), range(1, graph.root), graph.level_dict, level_index, graph)
+
+
+def construct_graph(depth, out_dir, topology, context):
+    root, target, node_set, level_dict, level_index = (topology.root, topology.target, topology.node_set,
+                                                       topology.level_dict, topology.level_index)
+    graph = topology.graph
+    profiler = context.profiler
 
     # traverse(root)
 
     total_elements = len(node_set)
     # print(f"total:{total_elements}")
 
-    removed = tag_nodes(node_set, NodeType.REMOVED, math.floor(total_elements * change_types['removed']/100))
-    all_removed = propagate_update(removed, NodeType.REMOVED, {})
+    profiler.phase('tagging')
+    removed = graph.tag(NodeType.REMOVED, math.floor(total_elements * change_types['removed']/100), context.random)
+    profiler.phase('propagate_update')
+    all_removed = propagate_update(removed, NodeType.REMOVED, graph)
+    profiler.phase('tagging')
 
     # print("------\ntotal removed:" + str(len(removed)))
     # for item in removed:
@@ -88,29 +391,28 @@ def construct_graph(depth, out_dir):
 
     # if a 'removed' node has a successor, we cannot tag this successor as newly 'added':
     # same applies for predecessor
-    blocked_candidates = all_removed.copy()
-    updated_set = {target}
+    updated_set = {graph.get_id(target)}
     for item in all_removed:
-        blocked_candidates = blocked_candidates.union(item.outgoing)
-        blocked_candidates = blocked_candidates.union(item.incoming)
-
-        for node in item.incoming:
-            if node.node_type != NodeType.REMOVED and node.node_type != NodeType.UPDATED:
-                node.node_type = NodeType.UPDATED
+        graph.block(item)
+        for node in graph.callees(item):
+            graph.block(node)
+        for node in graph.callers(item):
+            graph.block(node)
+            if graph.get_type(node) != NodeType.REMOVED and graph.get_type(node) != NodeType.UPDATED:
+                graph.set_type(node, NodeType.UPDATED)
                 updated_set.add(node)
 
-    # print("---------\nblocked candidates for add:" + str(len(blocked_candidates)))
-    # for item in blocked_candidates:
-    #     print(item)
-
-    remaining = node_set - blocked_candidates
-    added = tag_nodes(remaining, NodeType.ADDED, math.floor(total_elements * change_types['added']/100))
-    all_added = propagate_update(added, NodeType.ADDED, blocked_candidates)
+    # all nodes that are not blocked are candidates for 'added'
+    added = graph.tag(NodeType.ADDED, math.floor(total_elements * change_types['added']/100), context.random,
+                      unblocked=True)
+    profiler.phase('propagate_update')
+    all_added = propagate_update(added, NodeType.ADDED, graph, unblocked=True)
+    profiler.phase('tagging')
 
     for item in all_added:
-        for node in item.incoming:
-            if node.node_type == NodeType.UNCHANGED:
-                node.node_type= NodeType.UPDATED
+        for node in graph.callers(item):
+            if graph.get_type(node) == NodeType.UNCHANGED:
+                graph.set_type(node, NodeType.UPDATED)
                 updated_set.add(node)
 
     # print("------\ntotal added:" + str(len(added)))
@@ -123,11 +425,10 @@ def construct_graph(depth, out_dir):
     #
     # print("==========================")
 
-    update_candidates = node_set.difference(all_removed).difference(all_added).difference(updated_set)
-    updated = tag_nodes(update_candidates, NodeType.UPDATED, max(0, math.floor(total_elements * change_types['updated']/100) - len(updated_set)))
+    # all nodes still unchanged are candidates for 'updated'
+    updated = graph.tag(NodeType.UPDATED, max(0, math.floor(total_elements * change_types['updated']/100) - len(updated_set)), context.random)
 
     all_updated = updated.union(updated_set)
-    all_nodes = node_set.union(all_nodes)
 
     # print("------\ntotal updated (before " + str(len(updated_set)) + "):" + str(len(all_updated)))
     # for item in all_updated:
@@ -136,59 +437,80 @@ def construct_graph(depth, out_dir):
     # remaining = remaining - added
     # updated = tag_nodes(remaining, NodeType.UPDATED, math.floor(total_elements * change_types['updated']/100))
 
-    categorized = {
-        'node': {
-            NodeType.UNCHANGED: set(),
-            NodeType.REMOVED: set(),
-            NodeType.UPDATED: set(),
-            NodeType.ADDED: set()
-        },
-        'changes': {
-            'common': set(),
-            'calling_new_ep': set(),
-            'removing': set(),
-            'calling_ex_ep': set(),
-            'updated_caller': set(),
-            'updated_version': set(),
-            'updated_callee': set(),
-            'uncaptured': set(),
+    # change types of all nodes and edges, the traversal (or CompactGraph) of the whole graph
+    profiler.phase('categorize')
+    if graph_backend == 'compact':
+        categorized = graph.categorize()
+    else:
+        categorized = {
+            'node': {
+                NodeType.UNCHANGED: set(),
+                NodeType.REMOVED: set(),
+                NodeType.UPDATED: set(),
+                NodeType.ADDED: set()
+            },
+            'changes': {
+                'common': set(),
+                'calling_new_ep': set(),
+                'removing': set(),
+                'calling_ex_ep': set(),
+                'updated_caller': set(),
+                'updated_version': set(),
+                'updated_callee': set(),
+                'uncaptured': set(),
+            }
         }
-    }
-    traverse(root, categorized, visited=set(), print_node=False)
+        traverse(root, categorized, visited=set(), print_node=False)
 
     if not os.path.exists(out_dir):
         os.makedirs(out_dir)
 
-    save_summary_file(f"{out_dir}/summary.json", categorized['node'])
+    profiler.phase('serialisation')
+    compressed = output_format.endswith('.gz')
+    if output_format == 'bin':
+        save_binary_summary(f"{out_dir}/summary.bin", categorized['node'])
+    else:
+        save_summary_file(f"{out_dir}/summary.json{'.gz' if compressed else ''}", categorized['node'])
+
+    # callees are always located on a deeper level than their callers, deepest level first is a valid propagation order
+    profiler.phase('delay_propagation')
+    delays = DelayState(graph.order[::-1], graph)
+    base_graph = f"graph_0.{output_format}"
+    if deviation_output == 'delta':
+        profiler.phase('serialisation')
+        save_interaction_graph(f"{out_dir}/{base_graph}", categorized['changes'], delays)
 
     for probability in deviation_probabilities:
         if probability != 0:
-            add_performance_issues(all_updated, probability)
+            profiler.phase('delay_propagation')
+            add_performance_issues(all_updated, probability, delays, context.random)
 
-        save_interaction_graph(f"{out_dir}/graph_{probability}.json", categorized['changes'])
+        profiler.phase('serialisation')
+        if deviation_output != 'delta':
+            save_interaction_graph(f"{out_dir}/graph_{probability}.{output_format}", categorized['changes'], delays)
+        elif probability != 0:
+            save_deviation_delta(f"{out_dir}/graph_{probability}.delta.json{'.gz' if compressed else ''}",
+                                 base_graph, categorized['changes'], delays)
 
         # print("------------------------")
         # print(f"Deviation probability {probability}%:")
-        # traverse_generic(root, Node.print_with_deviation, visited=set())
+        # traverse_generic(root, lambda n: n.print_with_deviation(delays), visited=set())
 
         if probability != 0:
-            reset_performance_issues(all_nodes)
+            reset_performance_issues(delays)
 
+    profiler.phase('stats')
     print("========================")
     num_nodes = sum(len(value) for value in categorized['node'].values())
     num_edges = sum(len(value) for key,value in categorized['changes'].items() if key != 'uncaptured')
 
-    call_counter = []
-    for n in all_nodes:
-        call_counter.append(len(n.outgoing))
-
     stats = []
     stats.append(f"Depth: {depth}")
     stats.append(f"Total nodes: {num_nodes}")
     stats.append(f"Total edges: {num_edges}")
     stats.append(f"Density: {num_edges / (num_nodes * (num_nodes-1))}")
     stats.append(f"Max depth: {len(level_dict)}")
-    stats.append(f"Average calls: {sum(call_counter)/len(call_counter)}")
+    stats.append(f"Average calls: {sum(len(value) for value in categorized['changes'].values()) / num_nodes}")
 
     stats.append("\nNode details:")
     stats.append(f" |- unchanged: {len(categorized['node'][NodeType.UNCHANGED])}, "
@@ -215,6 +537,7 @@ def construct_graph(depth, out_dir):
         f.writelines('\n'.join(stats))
 
     print('\n'.join(stats))
+    profiler.phase(None)
 
     assert len(categorized['changes']['uncaptured']) == 0
 
@@ -223,33 +546,22 @@ def construct_graph(depth, out_dir):
     # save_summary_file("summary.json", categorized['node'])
 
 
-def add_performance_issues(node_set, deviation_probability):
+def add_performance_issues(node_set, deviation_probability, delays, rng=random):
     for node in node_set:
-        probability = random.randint(0, 100)
+        probability = rng.randint(0, 100)
         if probability <= deviation_probability:
-            node.deviation = random.randint(min_deviation, max_deviation) * 1000  # delay in microseconds
-            for item in node.incoming:
-                propagate_delay(item, node, node.deviation)
-
+            delays.add_deviation(node, rng.randint(min_deviation, max_deviation) * 1000)  # delay in microseconds
 
-def reset_performance_issues(node_set):
-    for node in node_set:
-        node.deviation = 0
-        node.cascaded_deviations = {}
+    delays.propagate()
 
 
-def propagate_delay(node, origin, delay):
-    if origin not in node.cascaded_deviations:
-        node.cascaded_deviations[origin] = delay
-        for item in node.incoming:
-            propagate_delay(item, origin, delay)
+def reset_performance_issues(delays):
+    delays.reset()
 
 
 def handle_standard_output(change_type, changes):
-    output = []
     for source, target in changes:
-        output.append(get_standard_entry(source, target, change_type))
-    return output
+        yield get_standard_entry(source, target, change_type)
 
 
 def get_standard_entry(source, target, change_type):
@@ -259,8 +571,7 @@ def get_standard_entry(source, target, change_type):
     }
 
 
-def handle_comparable_output(change_type, changes):
-    output = []
+def handle_comparable_output(change_type, changes, delays):
     for source, target in changes:
         entry = get_standard_entry(source, target, change_type)
         if change_type == 'updated_caller' or change_type == 'updated_version':
@@ -268,129 +579,496 @@ def handle_comparable_output(change_type, changes):
         if change_type == 'updated_callee' or change_type == 'updated_version':
             entry['oldTargetVersion'] = f"v{target.version}"
         entry['stats'] = {
-            'critical': True if target.deviation > 0 or len(target.cascaded_deviations)>0 else False,
-            'maxDeviation': target.deviation + sum(target.cascaded_deviations.values())
+            'critical': delays.is_critical(target),
+            'maxDeviation': delays.max_deviation(target)
         }
-        output.append(entry)
-    return output
+        yield entry
 
 
-def save_interaction_graph(path, categorized):
-    output = {}
-    with open(path, "w") as file:
-        standard = ['calling_new_ep', 'calling_ex_ep', 'removing']
-        comparable = ['common', 'updated_caller', 'updated_callee', 'updated_version']
+def save_interaction_graph(path, categorized, delays):
+    if path.endswith('.bin'):
+        save_binary_graph(path, categorized, delays)
+        return
 
-        for change_type in standard:
+    output = {}
+    with open_output(path) as file:
+        for change_type in STANDARD_CHANGES:
             output[change_type] = handle_standard_output(change_type, categorized[change_type])
 
-        for change_type in comparable:
-            output[change_type] = handle_comparable_output(change_type, categorized[change_type])
+        for change_type in COMPARABLE_CHANGES:
+            output[change_type] = handle_comparable_output(change_type, categorized[change_type], delays)
 
-        file.write(json.dumps(output))
+        if '.ndjson' in path:
+            write_ndjson(file, output)
+        else:
+            write_json(file, output)
 
 
-def save_summary_file(path, categorized):
-    output = {}
-    with open(path, "w") as file:
-        output['diff_summary'] = {'added_services': [{'service': n.name} for n in categorized[NodeType.ADDED]],
-                   'deleted_services': [{'service': n.name} for n in categorized[NodeType.REMOVED]],
-                   'added_versions': [{'service': n.name, 'version': f"v{n.version}"} for n in
-                                      categorized[NodeType.ADDED]] + \
-                                     [{'service': n.name, 'version': f"v{n.version + 1}"} for n in
-                                      categorized[NodeType.UPDATED]],
-                   'deleted_versions': [{'service': n.name, 'version': f"v{n.version}"} for n in
-                                        categorized[NodeType.REMOVED]] + \
-                                       [{'service': n.name, 'version': f"v{n.version}"} for n in
-                                        categorized[NodeType.UPDATED]],
-                   'added_endpoints': [n.get_json_entry() for n in categorized[NodeType.ADDED]] +
-                                      [n.get_json_entry(version_inc=True) for n in categorized[NodeType.UPDATED]],
-                   'deleted_endpoints': [n.get_json_entry() for n in categorized[NodeType.REMOVED]] +
-                                        [n.get_json_entry() for n in categorized[NodeType.UPDATED]]
-                   }
-        output['endpoints'] = [n.get_json_entry() for n in categorized[NodeType.ADDED]] +\
-                              [n.get_json_entry(version_inc=True) for n in categorized[NodeType.UPDATED]] +\
-                              [n.get_json_entry(version_inc=False) for n in categorized[NodeType.UPDATED]] +\
-                              [n.get_json_entry() for n in categorized[NodeType.REMOVED]] +\
-                              [n.get_json_entry() for n in categorized[NodeType.UNCHANGED]]
+def save_deviation_delta(path, base_graph, categorized, delays):
+    # only deviations differ between the variants of a graph: the delta lists [index, maxDeviation] of every critical
+    # edge, index being the position of the edge within its change type in the base graph. All other edges keep the
+    # stats of the base graph (not critical, no deviation)
+    output = {'base': base_graph, 'stats': {}}
+    for change_type in COMPARABLE_CHANGES:
+        output['stats'][change_type] = [[idx, delays.max_deviation(target)]
+                                        for idx, (source, target) in enumerate(categorized[change_type])
+                                        if delays.is_critical(target)]
 
+    with open_output(path) as file:
         file.write(json.dumps(output))
 
 
-def add_connections(node, level_dict):
+def read_interaction_graph(path):
+    # reads a difference graph written in any output format, a delta is applied to a fresh copy of its base graph
+    if path.endswith('.bin'):
+        return load_binary(path).to_json()
+
+    if '.delta.json' in path:
+        with open_input(path) as file:
+            delta = json.load(file)
+
+        output = read_interaction_graph(os.path.join(os.path.dirname(path), delta['base']))
+        for change_type, critical in delta['stats'].items():
+            for idx, deviation in critical:
+                output[change_type][idx]['stats'] = {'critical': True, 'maxDeviation': deviation}
+        return output
+
+    with open_input(path) as file:
+        if '.ndjson' not in path:
+            return json.load(file)
+
+        output = {change_type: [] for change_type in STANDARD_CHANGES + COMPARABLE_CHANGES}
+        for line in file:
+            entry = json.loads(line)
+            output[entry.pop('change')].append(entry)
+        return output
+
+
+def save_summary_file(path, categorized):
+    output = {}
+    with open_output(path) as file:
+        output['diff_summary'] = {'added_services': ({'service': n.name} for n in categorized[NodeType.ADDED]),
+                   'deleted_services': ({'service': n.name} for n in categorized[NodeType.REMOVED]),
+                   'added_versions': chain(({'service': n.name, 'version': f"v{n.version}"} for n in
+                                            categorized[NodeType.ADDED]),
+                                           ({'service': n.name, 'version': f"v{n.version + 1}"} for n in
+                                            categorized[NodeType.UPDATED])),
+                   'deleted_versions': chain(({'service': n.name, 'version': f"v{n.version}"} for n in
+                                              categorized[NodeType.REMOVED]),
+                                             ({'service': n.name, 'version': f"v{n.version}"} for n in
+                                              categorized[NodeType.UPDATED])),
+                   'added_endpoints': chain((n.get_json_entry() for n in categorized[NodeType.ADDED]),
+                                            (n.get_json_entry(version_inc=True) for n in categorized[NodeType.UPDATED])),
+                   'deleted_endpoints': chain((n.get_json_entry() for n in categorized[NodeType.REMOVED]),
+                                              (n.get_json_entry() for n in categorized[NodeType.UPDATED]))
+                   }
+        output['endpoints'] = chain((n.get_json_entry() for n in categorized[NodeType.ADDED]),
+                                    (n.get_json_entry(version_inc=True) for n in categorized[NodeType.UPDATED]),
+                                    (n.get_json_entry(version_inc=False) for n in categorized[NodeType.UPDATED]),
+                                    (n.get_json_entry() for n in categorized[NodeType.REMOVED]),
+                                    (n.get_json_entry() for n in categorized[NodeType.UNCHANGED]))
+
+        write_json(file, output)
+
+
+def open_output(path):
+    if path.endswith('.gz'):
+        return gzip.open(path, "wt", encoding="utf-8")
+    return open(path, "w")
+
+
+def open_input(path):
+    if path.endswith('.gz'):
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, "r")
+
+
+def write_json(file, output):
+    # same document as json.dumps(output), but lists are written entry by entry. Entries are produced lazily by
+    # generators, so the document never exists as a whole in memory
+    if isinstance(output, dict):
+        file.write('{')
+        for idx, (key, value) in enumerate(output.items()):
+            if idx > 0:
+                file.write(', ')
+            file.write(json.dumps(key) + ': ')
+            write_json(file, value)
+        file.write('}')
+    else:
+        file.write('[')
+        for idx, entry in enumerate(output):
+            if idx > 0:
+                file.write(', ')
+            file.write(json.dumps(entry))
+        file.write(']')
+
+
+def write_ndjson(file, output):
+    # a single change per line, the change category is added to every entry
+    for change_type, entries in output.items():
+        for entry in entries:
+            file.write(json.dumps({'change': change_type, **entry}) + '\n')
+
+
+def save_binary_graph(path, categorized, delays):
+    document = BinaryWriter('graph')
+    for change_type in STANDARD_CHANGES + COMPARABLE_CHANGES:
+        source_inc = change_type == 'updated_caller' or change_type == 'updated_version'
+        target_inc = change_type == 'updated_callee' or change_type == 'updated_version'
+
+        edges = array('i')
+        critical = array('B')
+        deviations = array('q')
+        old_versions = array('i')
+        for source, target in categorized[change_type]:
+            edges.append(document.add_node(source, source_inc))
+            edges.append(document.add_node(target, target_inc))
+            if change_type in COMPARABLE_CHANGES:
+                critical.append(delays.is_critical(target))
+                deviations.append(delays.max_deviation(target))
+                old_versions.append(document.add_string(f"v{source.version}") if source_inc else -1)
+                old_versions.append(document.add_string(f"v{target.version}") if target_inc else -1)
+
+        document.add_array(f"{change_type}.edges", edges, 2)
+        if change_type in COMPARABLE_CHANGES:
+            document.add_array(f"{change_type}.critical", critical)
+            document.add_array(f"{change_type}.maxDeviation", deviations)
+            document.add_array(f"{change_type}.oldVersions", old_versions, 2)
+
+    document.write(path)
+
+
+def save_binary_summary(path, categorized):
+    # the lists of summary.json as entry indices, entries of services and versions only leave out the other fields
+    document = BinaryWriter('summary')
+    # every list is made up of node types with the fields and version increment of their entries, node lists are
+    # not copied
+    lists = {
+        'diff_summary.added_services': [(NodeType.ADDED, 'service', False)],
+        'diff_summary.deleted_services': [(NodeType.REMOVED, 'service', False)],
+        'diff_summary.added_versions': [(NodeType.ADDED, 'version', False), (NodeType.UPDATED, 'version', True)],
+        'diff_summary.deleted_versions': [(NodeType.REMOVED, 'version', False), (NodeType.UPDATED, 'version', False)],
+        'diff_summary.added_endpoints': [(NodeType.ADDED, 'endpoint', False), (NodeType.UPDATED, 'endpoint', True)],
+        'diff_summary.deleted_endpoints': [(NodeType.REMOVED, 'endpoint', False),
+                                           (NodeType.UPDATED, 'endpoint', False)],
+        'endpoints': [(NodeType.ADDED, 'endpoint', False), (NodeType.UPDATED, 'endpoint', True),
+                      (NodeType.UPDATED, 'endpoint', False), (NodeType.REMOVED, 'endpoint', False),
+                      (NodeType.UNCHANGED, 'endpoint', False)]
+    }
+    for name, parts in lists.items():
+        document.add_array(name, array('i', (document.add_node(n, version_inc, fields)
+                                             for node_type, fields, version_inc in parts
+                                             for n in categorized[node_type])))
+    document.write(path)
+
+
+def convert(path):
+    # converts a json difference graph (any format, deltas are resolved) or summary to the binary format, returns the
+    # path of the binary file
+    name = os.path.basename(path).split('.')[0]
+    out_path = os.path.join(os.path.dirname(path), f"{name}.bin")
+
+    if name == 'summary':
+        with open_input(path) as file:
+            output = json.load(file)
+        document = BinaryWriter('summary')
+        lists = {f"diff_summary.{key}": value for key, value in output['diff_summary'].items()}
+        lists['endpoints'] = output['endpoints']
+        for key, entries in lists.items():
+            document.add_array(key, array('i', (document.add_entry(entry) for entry in entries)))
+    else:
+        output = read_interaction_graph(path)
+        document = BinaryWriter('graph')
+        for change_type in STANDARD_CHANGES + COMPARABLE_CHANGES:
+            entries = output.get(change_type, [])
+            document.add_array(f"{change_type}.edges", array('i', (document.add_entry(entry[end]) for entry in entries
+                                                                   for end in ('source', 'target'))), 2)
+            if change_type in COMPARABLE_CHANGES:
+                document.add_array(f"{change_type}.critical", array('B', (e['stats']['critical'] for e in entries)))
+                document.add_array(f"{change_type}.maxDeviation", array('q', (e['stats']['maxDeviation']
+                                                                              for e in entries)))
+                document.add_array(f"{change_type}.oldVersions", array('i', (
+                    document.add_string(entry.get(key)) for entry in entries
+                    for key in ('oldSourceVersion', 'oldTargetVersion'))), 2)
+
+    document.write(out_path)
+    return out_path
+
+
+def convert_corpus(paths):
+    # converts all graphs and summaries in the given folders (recursively) or files, the json files are kept
+    for path in paths:
+        files = [path] if os.path.isfile(path) else [os.path.join(folder, name) for folder, _, names in os.walk(path)
+                                                      for name in sorted(names)]
+        for file in files:
+            name = os.path.basename(file)
+            if name.startswith(('graph_', 'summary.')) and '.json' in name:
+                print(f"'{file}' -> '{convert(file)}'")
+
+
+class BinaryWriter:
+    # binary graphs and summaries: the magic BINARY_MAGIC, a little-endian uint32 with the length of a json header and
+    # the header itself, followed by little-endian arrays aligned to 8 bytes. The header lists kind ('graph' or
+    # 'summary') and dtype, shape and offset of every array. Strings are interned in a single utf-8 blob ('strings'
+    # with offsets 'stringOffsets'), entries (service, version, endpoint as string indices, -1 for missing fields) in
+    # 'entries'. Graphs hold per change category the edges as pairs of entry indices, critical flags, max deviations
+    # and old source/target versions, summaries the entry indices of every list in summary.json
+    def __init__(self, kind):
+        self.kind = kind
+        self.strings = {}
+        self.entries = {}
+        self.nodes = {}
+        self.arrays = {}
+
+    def add_string(self, value):
+        if value is None:
+            return -1
+        if value not in self.strings:
+            self.strings[value] = len(self.strings)
+        return self.strings[value]
+
+    def add_entry(self, entry):
+        key = (self.add_string(entry.get('service')), self.add_string(entry.get('version')),
+               self.add_string(entry.get('endpoint')))
+        if key not in self.entries:
+            self.entries[key] = len(self.entries)
+        return self.entries[key]
+
+    def add_node(self, node, version_inc=False, fields='endpoint'):
+        # fields of the entry: 'service', 'version' (service and version) or 'endpoint' (all of them)
+        key = (node, version_inc, fields)
+        if key not in self.nodes:
+            entry = node.get_json_entry(version_inc)
+            if fields != 'endpoint':
+                del entry['endpoint']
+            if fields == 'service':
+                del entry['version']
+            self.nodes[key] = self.add_entry(entry)
+        return self.nodes[key]
+
+    def add_array(self, name, values, width=1):
+        self.arrays[name] = (values, [len(values) // width, width] if width > 1 else [len(values)])
+
+    def write(self, path):
+        blob = array('B')
+        offsets = array('q', [0])
+        for value in self.strings:
+            blob.frombytes(value.encode())
+            offsets.append(len(blob))
+        self.add_array('strings', blob)
+        self.add_array('stringOffsets', offsets)
+        self.add_array('entries', array('i', chain.from_iterable(self.entries)), 3)
+
+        header = {'kind': self.kind, 'arrays': {}}
+        offset = 0
+        for name, (values, shape) in self.arrays.items():
+            header['arrays'][name] = {'dtype': BINARY_DTYPES[values.typecode], 'shape': shape, 'offset': offset}
+            offset += -(-len(values) * values.itemsize // 8) * 8
+        header = json.dumps(header).encode()
+        header += b' ' * (-(len(BINARY_MAGIC) + 4 + len(header)) % 8)
+
+        with open(path, "wb") as file:
+            file.write(BINARY_MAGIC)
+            file.write(len(header).to_bytes(4, 'little'))
+            file.write(header)
+            for values, _ in self.arrays.values():
+                if sys.byteorder != 'little':
+                    values = array(values.typecode, values)
+                    values.byteswap()
+                file.write(values.tobytes())
+                file.write(b'\0' * (-len(values) * values.itemsize % 8))
+
+
+def load_binary(path):
+    # maps a binary graph or summary into memory, arrays are views on the mapped file and nothing is copied
+    with open(path, "rb") as file:
+        mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if mapped[:len(BINARY_MAGIC)] != BINARY_MAGIC:
+        raise ValueError(f"'{path}' is no binary difference graph")
+    start = len(BINARY_MAGIC) + 4
+    length = int.from_bytes(mapped[len(BINARY_MAGIC):start], 'little')
+    header = json.loads(mapped[start:start + length])
+    return BinaryDocument(mapped, start + length, header)
+
+
+class BinaryDocument:
+    # arrays of a binary graph or summary (see BinaryWriter) as numpy arrays, e.g. document.arrays['common.edges'][:, 1]
+    # are the entry indices of the callees of all common calls. Without numpy arrays are flat memoryviews
+    def __init__(self, mapped, start, header):
+        self.kind = header['kind']
+        self.arrays = {}
+        self.shapes = {name: layout['shape'] for name, layout in header['arrays'].items()}
+        self._strings = None
+
+        for name, layout in header['arrays'].items():
+            count = math.prod(layout['shape'])
+            if numpy is not None:
+                self.arrays[name] = numpy.frombuffer(mapped, dtype=layout['dtype'], count=count,
+                                                     offset=start + layout['offset']).reshape(layout['shape'])
+            else:
+                itemsize = int(layout['dtype'][2:])
+                view = memoryview(mapped)[start + layout['offset']:start + layout['offset'] + count * itemsize]
+                self.arrays[name] = view.cast(BINARY_FORMATS[layout['dtype']])
+
+    def strings(self):
+        # the interned strings are only decoded if they are needed
+        if self._strings is None:
+            blob = bytes(self.arrays['strings'])
+            offsets = self.arrays['stringOffsets'].tolist()
+            self._strings = [blob[offsets[i]:offsets[i + 1]].decode() for i in range(len(offsets) - 1)]
+        return self._strings
+
+    def rows(self, name):
+        # an array as list, a list per row for two-dimensional arrays
+        values = self.arrays[name].tolist()
+        if isinstance(self.arrays[name], memoryview) and len(self.shapes[name]) == 2:
+            width = self.shapes[name][1]
+            values = [values[i:i + width] for i in range(0, len(values), width)]
+        return values
+
+    def to_json(self):
+        # the same document as the json graph or summary
+        strings = self.strings()
+        entries = [{key: strings[value] for key, value in zip(('service', 'version', 'endpoint'), entry) if value != -1}
+                   for entry in self.rows('entries')]
+        if self.kind == 'summary':
+            output = {'diff_summary': {}}
+            for name, values in self.arrays.items():
+                if name.startswith('diff_summary.'):
+                    output['diff_summary'][name.split('.', 1)[1]] = [dict(entries[idx]) for idx in values.tolist()]
+            output['endpoints'] = [dict(entries[idx]) for idx in self.arrays['endpoints'].tolist()]
+            return output
+
+        output = {}
+        for change_type in STANDARD_CHANGES + COMPARABLE_CHANGES:
+            output[change_type] = []
+            edges = self.rows(f"{change_type}.edges")
+            if change_type in STANDARD_CHANGES:
+                output[change_type] = [{'source': dict(entries[source]), 'target': dict(entries[target])}
+                                       for source, target in edges]
+                continue
+
+            stats = zip(edges, self.arrays[f"{change_type}.critical"].tolist(),
+                        self.arrays[f"{change_type}.maxDeviation"].tolist(),
+                        self.rows(f"{change_type}.oldVersions"))
+            for (source, target), critical, deviation, (old_source, old_target) in stats:
+                entry = {'source': dict(entries[source]), 'target': dict(entries[target])}
+                if old_source != -1:
+                    entry['oldSourceVersion'] = strings[old_source]
+                if old_target != -1:
+                    entry['oldTargetVersion'] = strings[old_target]
+                entry['stats'] = {'critical': bool(critical), 'maxDeviation': deviation}
+                output[change_type].append(entry)
+        return output
+
+
+def add_connections(node, level_index, context):
     # determine how many edges to add
-    num_edges = round(min(6, max(0, random.gauss(edge_mean, edge_std))))
+    num_edges = round(min(6, max(0, context.random.gauss(context.edge_mean, context.edge_std))))
 
     if num_edges == 0:
         return
 
-    candidates = set()
-    for level,level_set in level_dict.items():
-        if level > node.level:
-            candidates = candidates.union(level_set)
-
-    # remove those nodes where there already exists a connection to
-    candidates = candidates - node.outgoing
-
-    picked = random.sample(candidates, min(num_edges, len(candidates)))
+    picked = level_index.sample_deeper(node, num_edges, context.random)
     for item in picked:
         node.outgoing.add(item)
         item.incoming.add(node)
 
 
-def tag_nodes(node_set, node_type, num_nodes):
-    if num_nodes > len(node_set):
-        return set()
+def propagate_update(node_set, node_type, graph, unblocked=False):
+    # node_set holds ids of graph (ChangeTagger or CompactGraph), with unblocked blocked nodes are never tagged
+    updated_set = node_set.copy()
 
-    selection = set(random.sample(node_set, num_nodes))
-    for node in selection:
-        node.node_type = node_type
+    for node in node_set:
+        for candidate in graph.callees(node):
+            if not (unblocked and graph.is_blocked(candidate)):
+                traverse_update(node, candidate, updated_set, node_type, graph, unblocked)
 
-    return selection
+    return updated_set
 
 
-def propagate_update(node_set, node_type, blocked_nodes):
-    updated_set = node_set.copy()
+def traverse_update(node, candidate, updated_set, node_type, graph, unblocked):
+    # depth first on an explicit stack, children are pushed in reverse to be visited in their original order
+    stack = [(node, candidate)]
+    while stack:
+        node, candidate = stack.pop()
+        if graph.get_type(candidate) == node_type:
+            continue
 
-    for node in node_set:
-        for candidate in node.outgoing:
-            if candidate not in blocked_nodes:
-                traverse_update(node, candidate, updated_set, node_type, blocked_nodes)
+        callers = graph.callers(candidate)
+        if len(callers) == 1 and node in callers and not (unblocked and graph.is_blocked(candidate)):
+            graph.set_type(candidate, node_type)
+            updated_set.add(candidate)
 
-    return updated_set
+            for new_candidate in reversed(list(graph.callees(candidate))):
+                if len(graph.callers(new_candidate)) == 1:
+                    stack.append((candidate, new_candidate))
 
 
-def traverse_update(node, candidate, updated_set, node_type, blocked_nodes):
-    if candidate.node_type == node_type:
-        return
+def grow_tree(target, depth, node_set, level_dict, context):
+    # creates a basic tree structure, every node has random.gauss(branch_mean, branch_std) successors. Afterwards the
+    # tree is topped up step by step instead of starting over: a branch that ended before the maximum depth (on the
+    # highest level there is one) grows a new subtree. Yields the number of nodes after every step
+    created = [target] + create_child_nodes(target, depth, node_set, level_dict, max_depth=depth, context=context)
+    dead_ends = {}
 
-    if len(candidate.incoming) == 1 and node in candidate.incoming and candidate not in blocked_nodes:
-        candidate.node_type = node_type
-        updated_set.add(candidate)
+    while True:
+        yield len(node_set)
+
+        # nodes on level depth + 1 are at the maximum depth and can not grow any further
+        for node in created:
+            if not node.outgoing and node.level <= depth:
+                dead_ends.setdefault(node.level, []).append(node)
+
+        if dead_ends:
+            level = min(dead_ends)
+            node = dead_ends[level].pop(context.random.randrange(len(dead_ends[level])))
+            if not dead_ends[level]:
+                del dead_ends[level]
+        else:
+            # all branches reach the maximum depth, widen the tree below a random inner node instead
+            node = context.random.choice([target] + [n for level in sorted(level_dict) if level <= depth
+                                                     for n in level_dict[level]])
+
+        created = [node] + create_child_nodes(node, depth + 1 - node.level, node_set, level_dict, max_depth=depth,
+                                              context=context)
+
+
+def create_child_nodes(node, depth, node_set, level_dict, max_depth, context):
+    # depth first, a child's subtree is completed before its next sibling is created. Every stack entry holds a node,
+    # its remaining depth and the number of children still to create
+    created = []
+    stack = [[node, depth, get_num_children(depth, context)]]
+
+    while stack:
+        entry = stack[-1]
+        parent, parent_depth, num_children = entry
+
+        # no (more) children, we are done with this node
+        if num_children == 0:
+            stack.pop()
+            continue
+
+        entry[2] -= 1
+        uid = context.get_unique_id()
+        child = Node(f"a{uid}", uid=uid, level=max_depth - parent_depth + 2)
+        child.incoming.add(parent)
+        parent.outgoing.add(child)
+        node_set.add(child)
+        add_to_level(level_dict, child)
+        created.append(child)
+        stack.append([child, parent_depth - 1, get_num_children(parent_depth - 1, context)])
 
-        for new_candidate in candidate.outgoing:
-            if len(new_candidate.incoming) == 1:
-                traverse_update(candidate, new_candidate, updated_set, node_type, blocked_nodes)
+    return created
 
 
-def create_child_nodes(node, depth, node_set, level_dict, max_depth):
+def get_num_children(depth, context):
     # stop creation when maximum depth is reached
     if depth == 0:
-        return
-
-    num_children = round(min(8, max(0, random.gauss(branch_mean, branch_std))))
-
-    # no children, we are done
-    if num_children == 0:
-        return
+        return 0
 
-    for idx in range(num_children):
-        child = Node(get_unique_name(), level=max_depth - depth + 2)
-        child.incoming.add(node)
-        node.outgoing.add(child)
-        node_set.add(child)
-        add_to_level(level_dict, child)
-        create_child_nodes(child, depth-1, node_set, level_dict, max_depth)
+    return round(min(8, max(0, context.random.gauss(context.branch_mean, context.branch_std))))
 
 
 def add_to_level(level_dict, node):
@@ -399,9 +1077,9 @@ def add_to_level(level_dict, node):
 
     level = node.level
     if level not in level_dict:
-        level_dict[level] = set()
+        level_dict[level] = []
 
-    level_dict[level].add(node)
+    level_dict[level].append(node)
 
 
 def traverse(node, stats, visited, print_node=False):
@@ -413,9 +1091,24 @@ def traverse(node, stats, visited, print_node=False):
 
     update_node_stats(node, stats)
     visited.add(node)
-    for child in node.outgoing:
+
+    # depth first, every stack entry holds a node and the iterator over its remaining children
+    stack = [(node, iter(node.outgoing))]
+    while stack:
+        node, children = stack[-1]
+        child = next(children, None)
+        if child is None:
+            stack.pop()
+            continue
+
         update_change_type_stats(node, child, stats)
-        traverse(child, stats, visited, print_node)
+        if child not in visited:
+            if print_node:
+                print(child)
+
+            update_node_stats(child, stats)
+            visited.add(child)
+            stack.append((child, iter(child.outgoing)))
 
 
 def traverse_generic(node, func, visited):
@@ -423,10 +1116,17 @@ def traverse_generic(node, func, visited):
         return
 
     print(func(node))
-
     visited.add(node)
-    for child in node.outgoing:
-        traverse_generic(child, func, visited)
+
+    stack = [iter(node.outgoing)]
+    while stack:
+        child = next(stack[-1], None)
+        if child is None:
+            stack.pop()
+        elif child not in visited:
+            print(func(child))
+            visited.add(child)
+            stack.append(iter(child.outgoing))
 
 
 def update_node_stats(node, stats):
@@ -434,28 +1134,269 @@ def update_node_stats(node, stats):
 
 
 def update_change_type_stats(node, child, stats):
-    if node.node_type == NodeType.UNCHANGED and child.node_type == NodeType.UNCHANGED:
-        stats['changes']['common'].add((node, child))
-    elif (node.node_type == NodeType.UNCHANGED or node.node_type == NodeType.UPDATED or node.node_type == NodeType.ADDED) and child.node_type == NodeType.ADDED:
-        stats['changes']['calling_new_ep'].add((node, child))
-    elif (node.node_type == NodeType.UPDATED and child.node_type == NodeType.REMOVED) or node.node_type == NodeType.REMOVED:
-        stats['changes']['removing'].add((node, child))
-    elif node.node_type == NodeType.ADDED and (child.node_type == NodeType.UNCHANGED or child.node_type == NodeType.UPDATED):
-        stats['changes']['calling_ex_ep'].add((node, child))
-    elif node.node_type == NodeType.UPDATED and child.node_type == NodeType.UNCHANGED:
-        stats['changes']['updated_caller'].add((node, child))
-    elif node.node_type == NodeType.UPDATED and child.node_type == NodeType.UPDATED:
-        stats['changes']['updated_version'].add((node, child))
-    elif node.node_type == NodeType.UNCHANGED and child.node_type == NodeType.UPDATED:
-        stats['changes']['updated_callee'].add((node, child))
+    stats['changes'][get_change_type(node.node_type, child.node_type)].add((node, child))
+
+
+def get_change_type(node_type, child_type):
+    if node_type == NodeType.UNCHANGED and child_type == NodeType.UNCHANGED:
+        return 'common'
+    elif (node_type == NodeType.UNCHANGED or node_type == NodeType.UPDATED or node_type == NodeType.ADDED) and child_type == NodeType.ADDED:
+        return 'calling_new_ep'
+    elif (node_type == NodeType.UPDATED and child_type == NodeType.REMOVED) or node_type == NodeType.REMOVED:
+        return 'removing'
+    elif node_type == NodeType.ADDED and (child_type == NodeType.UNCHANGED or child_type == NodeType.UPDATED):
+        return 'calling_ex_ep'
+    elif node_type == NodeType.UPDATED and child_type == NodeType.UNCHANGED:
+        return 'updated_caller'
+    elif node_type == NodeType.UPDATED and child_type == NodeType.UPDATED:
+        return 'updated_version'
+    elif node_type == NodeType.UNCHANGED and child_type == NodeType.UPDATED:
+        return 'updated_callee'
     else:
-        stats['changes']['uncaptured'].add((node, child))
-
-
-def get_unique_name():
-    global node_counter
-    node_counter += 1
-    return f"a{node_counter}"
+        return 'uncaptured'
+
+
+class GraphContext:
+    # everything a single graph depends on besides its depth: parameters, an own random generator and node labels.
+    # Graphs do not share any state, they can be generated in any order or in parallel and remain reproducible
+    def __init__(self, seed, branch_mean=branch_mean, branch_std=branch_std, edge_mean=edge_mean, edge_std=edge_std):
+        self.random = random.Random(seed)
+        self.branch_mean = branch_mean
+        self.branch_std = branch_std
+        self.edge_mean = edge_mean
+        self.edge_std = edge_std
+        self.node_counter = 0
+        self.profiler = PhaseProfiler()
+
+    # used for unique node labeling
+    def get_unique_id(self):
+        self.node_counter += 1
+        return self.node_counter
+
+
+class PhaseProfiler:
+    # wall time, number of measurements and allocation peak (if tracemalloc is tracing) per phase of a single graph.
+    # phase() ends the running phase and starts the next one (None only ends it), measurements of the same phase and
+    # overlay are summed up. Does nothing unless enabled
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.overlay = None
+        self.records = {}
+        self.current = None
+        self.start = 0
+
+    def phase(self, name):
+        if not self.enabled:
+            return
+
+        end = time.perf_counter()
+        if self.current is not None:
+            record = self.records.setdefault((self.overlay, self.current),
+                                             {'calls': 0, 'wall': 0.0, 'peakMemory': None})
+            record['calls'] += 1
+            record['wall'] += end - self.start
+            if tracemalloc.is_tracing():
+                record['peakMemory'] = max(record['peakMemory'] or 0, tracemalloc.get_traced_memory()[1])
+
+        self.current = name
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+        self.start = time.perf_counter()
+
+    def write(self, path, **details):
+        # a json line per phase, phases of the topology have no overlay. Written at once, processes generating graphs
+        # in parallel do not interleave their lines
+        self.phase(None)
+        lines = [json.dumps({**details, 'overlay': overlay, 'phase': phase, **record}) + '\n'
+                 for (overlay, phase), record in self.records.items()]
+        with open(path, "a") as file:
+            file.write(''.join(lines))
+
+
+class LevelIndex:
+    # all nodes in a flat list sorted by level, every level starts at a known offset. The nodes on a deeper level
+    # than a given node are therefore always a suffix of this list and can be sampled without building a candidate set
+    def __init__(self, level_dict, nodes=None):
+        self.nodes = nodes if nodes is not None else []
+        self.levels = sorted(level_dict)
+        self.offsets = []
+
+        for level in self.levels:
+            self.offsets.append(len(self.nodes))
+            self.nodes.extend(level_dict[level])
+
+    def deeper_offset(self, level):
+        # offset of the first node located on a level below the given one
+        idx = bisect_right(self.levels, level)
+        return self.offsets[idx] if idx < len(self.offsets) else len(self.nodes)
+
+    def sample_deeper(self, node, num_nodes, rng=random):
+        start = self.deeper_offset(node.level)
+        available = len(self.nodes) - start - sum(1 for n in node.outgoing if n.level > node.level)
+        num_nodes = min(num_nodes, available)
+
+        if num_nodes <= 0:
+            return []
+
+        # only a handful of candidates left, rejection sampling would mostly hit existing connections
+        if 2 * num_nodes > available:
+            candidates = [n for n in self.nodes[start:] if n not in node.outgoing]
+            return rng.sample(candidates, num_nodes)
+
+        # rejection sampling on the suffix, existing connections and duplicates are drawn again
+        picked = []
+        while len(picked) < num_nodes:
+            candidate = self.nodes[rng.randrange(start, len(self.nodes))]
+            if candidate not in node.outgoing and candidate not in picked:
+                picked.append(candidate)
+
+        return picked
+
+
+class Topology:
+    # structure of a graph, independent of change types and deviations: nodes, their connections and levels. Change
+    # types are tagged on top of it (copy on write, the graph keeps the untagged types), reset() restores the
+    # untagged graph for the next overlay
+    def __init__(self, root, target, node_set, level_dict, level_index, graph):
+        self.root = root
+        self.target = target
+        self.node_set = node_set
+        self.level_dict = level_dict
+        self.level_index = level_index
+        self.graph = graph
+
+    def reset(self):
+        self.graph.reset()
+
+
+class ChangeTagger:
+    # node types and blocked flags of all nodes besides root and target in flat arrays, indexed by the position of a
+    # node in the level index. Nodes are tagged in place, the candidates of a change type are collected in a single
+    # pass over both arrays instead of building set differences of all nodes, the whole tagging takes linear time.
+    # Candidates are drawn from a list in level index order, the order no longer depends on set iteration.
+    # Tagging, propagation and deviations identify nodes by get_id(), the nodes themselves for the 'objects' backend
+    # (CompactGraph offers the same interface on integer ids)
+    def __init__(self, root, target, nodes):
+        self.nodes = nodes
+        self.order = [root, target] + nodes
+        self.ids = {node: idx for idx, node in enumerate(nodes)}
+        self.types = bytearray(NODE_TYPES.index(node.node_type) for node in nodes)
+        self.blocked = bytearray(len(nodes))
+        self.untagged = bytes(self.types)
+        self.changed = []
+
+    def reset(self):
+        # only the nodes tagged since the last reset are restored
+        for idx in self.changed:
+            self.types[idx] = self.untagged[idx]
+            self.nodes[idx].node_type = NODE_TYPES[self.untagged[idx]]
+        self.changed = []
+        self.blocked = bytearray(len(self.nodes))
+
+    def get_id(self, node):
+        return node
+
+    def callees(self, node):
+        return node.outgoing
+
+    def callers(self, node):
+        return node.incoming
+
+    # blocked nodes are never tagged by propagation
+    def is_blocked(self, node):
+        idx = self.ids.get(node)
+        return idx is not None and self.blocked[idx] == 1
+
+    def block(self, node):
+        idx = self.ids.get(node)
+        if idx is not None:
+            self.blocked[idx] = 1
+
+    def get_type(self, node):
+        return node.node_type
+
+    def set_type(self, node, node_type):
+        node.node_type = node_type
+        idx = self.ids.get(node)
+        if idx is not None:
+            if self.types[idx] == self.untagged[idx]:
+                self.changed.append(idx)
+            self.types[idx] = NODE_TYPES.index(node_type)
+
+    def tag(self, node_type, num_nodes, rng=random, unblocked=False):
+        # samples num_nodes of the unchanged (or all unblocked) nodes, nothing is tagged if there are not enough
+        if unblocked:
+            pool = [idx for idx, flag in enumerate(self.blocked) if not flag]
+        else:
+            unchanged = NODE_TYPES.index(NodeType.UNCHANGED)
+            pool = [idx for idx, code in enumerate(self.types) if code == unchanged]
+
+        if num_nodes > len(pool):
+            return set()
+
+        selection = set()
+        for idx in rng.sample(pool, num_nodes):
+            self.set_type(self.nodes[idx], node_type)
+            selection.add(self.nodes[idx])
+
+        return selection
+
+
+class DelayState:
+    # performance deviations of a single graph variant. Every deviating node gets a bit, the successors of a node that
+    # deviate are kept as bit mask per node. Propagation is a single pass over all nodes in reverse topological order
+    # (callees before callers), a caller simply merges the masks of its callees. A node reached over several paths
+    # is therefore only counted once, just as the former recursive propagation did. Nodes are ids of graph, the
+    # output looks up the stats of a node by the node itself
+    def __init__(self, order, graph):
+        self.order = order
+        self.graph = graph
+        self.deviations = {}
+        self.deviating = []
+        self.cascaded = {}
+        self.max_deviations = {}
+
+    def add_deviation(self, node, delay):
+        if node not in self.deviations:
+            self.deviating.append(node)
+        self.deviations[node] = delay
+
+    def propagate(self):
+        bits = {node: 1 << idx for idx, node in enumerate(self.deviating)}
+        self.cascaded = {}
+        self.max_deviations = {}
+
+        for node in self.order:
+            mask = 0
+            for child in self.graph.callees(node):
+                mask |= self.cascaded.get(child, 0) | bits.get(child, 0)
+            if mask:
+                self.cascaded[node] = mask
+
+    def reset(self):
+        self.deviations = {}
+        self.deviating = []
+        self.cascaded = {}
+        self.max_deviations = {}
+
+    def is_critical(self, node):
+        node = self.graph.get_id(node)
+        return node in self.deviations or node in self.cascaded
+
+    def cascaded_deviations(self, node):
+        # lowest bit first, reading the binary representation once avoids shifting large masks bit by bit
+        bits = bin(self.cascaded.get(node, 0))[:1:-1]
+        idx = bits.find('1')
+        while idx != -1:
+            origin = self.deviating[idx]
+            yield origin, self.deviations[origin]
+            idx = bits.find('1', idx + 1)
+
+    def max_deviation(self, node):
+        node = self.graph.get_id(node)
+        if node not in self.max_deviations:
+            self.max_deviations[node] = self.deviations.get(node, 0) + sum(d for _, d in self.cascaded_deviations(node))
+        return self.max_deviations[node]
 
 
 class NodeType(Enum):
@@ -465,22 +1406,314 @@ class NodeType(Enum):
     UPDATED = 4
 
 
+NODE_TYPES = [NodeType.UNCHANGED, NodeType.ADDED, NodeType.REMOVED, NodeType.UPDATED]
+CHANGE_TYPES = ['common', 'calling_new_ep', 'removing', 'calling_ex_ep', 'updated_caller', 'updated_version',
+                'updated_callee', 'uncaptured']
+
+# output sections of a difference graph, only comparable changes carry performance stats
+STANDARD_CHANGES = ['calling_new_ep', 'calling_ex_ep', 'removing']
+COMPARABLE_CHANGES = ['common', 'updated_caller', 'updated_callee', 'updated_version']
+
+
+class CompactGraph:
+    # array-backed graph for huge graphs, node objects are only created for the output. Nodes are identified by their
+    # uid (target 0, the root, uid -1, by the last id). grow_tree and add_connections make the same random decisions as
+    # the functions of the 'objects' backend on arrays of levels, tree parents and numbers of children, build() turns
+    # tree and connections into CSR layout: the callees of node i are targets[offsets[i]:offsets[i + 1]], its callers
+    # sources[source_offsets[i]:source_offsets[i + 1]]. Node types are kept as small ints, tagging, propagation and
+    # deviations only work on ids. Ids hash like the nodes (by uid), sets of ids iterate in the same order as sets of
+    # nodes and all random decisions are the same as with ChangeTagger
+    def __init__(self):
+        self.levels = array('i', [1])
+        self.parents = array('i', [-1])
+        self.num_children = array('i', [0])
+        self.level_dict = {}
+        self.root = None
+
+    def grow_tree(self, depth, context):
+        # see grow_tree, the target is id 0
+        created = [0] + self.create_child_nodes(0, depth, depth, context)
+        dead_ends = {}
+
+        while True:
+            yield len(self.levels) - 1
+
+            for node in created:
+                if not self.num_children[node] and self.levels[node] <= depth:
+                    dead_ends.setdefault(self.levels[node], []).append(node)
+
+            if dead_ends:
+                level = min(dead_ends)
+                node = dead_ends[level].pop(context.random.randrange(len(dead_ends[level])))
+                if not dead_ends[level]:
+                    del dead_ends[level]
+            else:
+                node = context.random.choice([0] + [n for level in sorted(self.level_dict) if level <= depth
+                                                    for n in self.level_dict[level]])
+
+            created = [node] + self.create_child_nodes(node, depth + 1 - self.levels[node], depth, context)
+
+    def create_child_nodes(self, node, depth, max_depth, context):
+        # see create_child_nodes, uids are handed out in creation order and index the arrays
+        created = []
+        stack = [[node, depth, get_num_children(depth, context)]]
+
+        while stack:
+            entry = stack[-1]
+            parent, parent_depth, num_children = entry
+            if num_children == 0:
+                stack.pop()
+                continue
+
+            entry[2] -= 1
+            uid = context.get_unique_id()
+            level = max_depth - parent_depth + 2
+            self.levels.append(level)
+            self.parents.append(parent)
+            self.num_children.append(0)
+            self.num_children[parent] += 1
+            self.level_dict.setdefault(level, array('i')).append(uid)
+            created.append(uid)
+            stack.append([uid, parent_depth - 1, get_num_children(parent_depth - 1, context)])
+
+        return created
+
+    def add_connections(self, level_index, context):
+        # see add_connections, the target first and all other nodes by uid just as construct_topology iterates its
+        # node set. The callees of a node are its tree children and the connections added here, both on deeper levels
+        self.connection_offsets = array('q', [0])
+        self.connections = array('i')
+        for node in range(len(self.levels)):
+            num_edges = round(min(6, max(0, context.random.gauss(context.edge_mean, context.edge_std))))
+            if num_edges > 0:
+                self.connections.extend(self.sample_deeper(node, num_edges, level_index, context.random))
+            self.connection_offsets.append(len(self.connections))
+
+    def sample_deeper(self, node, num_nodes, level_index, rng):
+        # see LevelIndex.sample_deeper, a node on a deeper level is a callee if it is a tree child of node
+        nodes = level_index.nodes
+        start = level_index.deeper_offset(self.levels[node])
+        available = len(nodes) - start - self.num_children[node]
+        num_nodes = min(num_nodes, available)
+
+        if num_nodes <= 0:
+            return []
+
+        if 2 * num_nodes > available:
+            candidates = [n for n in nodes[start:] if self.parents[n] != node]
+            return rng.sample(candidates, num_nodes)
+
+        picked = []
+        while len(picked) < num_nodes:
+            candidate = nodes[rng.randrange(start, len(nodes))]
+            if self.parents[candidate] != node and candidate not in picked:
+                picked.append(candidate)
+
+        return picked
+
+    def build(self, level_index):
+        # callees of every node are its children (by uid) and its connections, callers its tree parent and the sources
+        # of connections to it (by uid). Both are listed in the iteration order of the sets of the 'objects' backend,
+        # which inserts them in the same order and hashes nodes like their ids: sets of tagged ids are filled in the
+        # same order and all random decisions of tagging and deviations stay the same. The arrays of the construction
+        # are released
+        num_nodes = len(self.levels)
+        self.root = num_nodes
+        self.order = array('i', [self.root, 0])
+        self.order.extend(level_index.nodes)
+
+        child_offsets = array('q', [0])
+        for count in self.num_children:
+            child_offsets.append(child_offsets[-1] + count)
+        children = array('i', bytes(4 * (num_nodes - 1)))
+        free = array('q', child_offsets)
+        for uid in range(1, num_nodes):
+            children[free[self.parents[uid]]] = uid
+            free[self.parents[uid]] += 1
+
+        self.offsets = array('q', [0])
+        self.targets = array('i')
+        for node in range(num_nodes):
+            callees = children[child_offsets[node]:child_offsets[node + 1]]
+            callees.extend(self.connections[self.connection_offsets[node]:self.connection_offsets[node + 1]])
+            self.targets.extend(set(callees) if len(callees) > 1 else callees)
+            self.offsets.append(len(self.targets))
+        self.targets.append(0)
+        self.offsets.append(len(self.targets))
+        del children, free, child_offsets
+
+        self.source_offsets = array('q', bytes(8 * (num_nodes + 2)))
+        for target in self.targets:
+            self.source_offsets[target + 1] += 1
+        for idx in range(num_nodes + 1):
+            self.source_offsets[idx + 1] += self.source_offsets[idx]
+        self.sources = array('i', bytes(4 * len(self.targets)))
+        free = array('q', self.source_offsets)
+        self.sources[0] = self.root
+        for uid in range(1, num_nodes):
+            self.sources[free[uid]] = self.parents[uid]
+            free[uid] += 1
+        free[0] += 1
+        for source in range(num_nodes):
+            for target in self.connections[self.connection_offsets[source]:self.connection_offsets[source + 1]]:
+                self.sources[free[target]] = source
+                free[target] += 1
+        for node in range(num_nodes):
+            start, end = self.source_offsets[node], self.source_offsets[node + 1]
+            if end - start > 1:
+                self.sources[start:end] = array('i', set(self.sources[start:end]))
+        del free
+        self.levels = self.parents = self.num_children = self.connections = self.connection_offsets = None
+        self.nodes = [None] * (num_nodes + 1)
+
+        # the target is updated by definition
+        self.types = bytearray(num_nodes + 1)
+        self.types[0] = NODE_TYPES.index(NodeType.UPDATED)
+        self.blocked = bytearray(num_nodes + 1)
+        self.untagged = bytes(self.types)
+        self.changed = []
+
+    def node(self, idx):
+        # node objects are only created once they are written and hold neither adjacency nor type
+        if self.nodes[idx] is None:
+            uid = -1 if idx == self.root else idx
+            name = "edge" if uid == -1 else "target" if uid == 0 else f"a{uid}"
+            self.nodes[idx] = Node(name, uid=uid, incoming=(), outgoing=(), node_type=None)
+        return self.nodes[idx]
+
+    def reset(self):
+        # only the nodes tagged since the last reset are restored
+        for idx in self.changed:
+            self.types[idx] = self.untagged[idx]
+        self.changed = []
+        self.blocked = bytearray(len(self.types))
+
+    def get_id(self, node):
+        return node.uid % len(self.types)
+
+    def callees(self, idx):
+        return self.targets[self.offsets[idx]:self.offsets[idx + 1]]
+
+    def callers(self, idx):
+        return self.sources[self.source_offsets[idx]:self.source_offsets[idx + 1]]
+
+    def is_blocked(self, idx):
+        return self.blocked[idx] == 1
+
+    def block(self, idx):
+        self.blocked[idx] = 1
+
+    def get_type(self, idx):
+        return NODE_TYPES[self.types[idx]]
+
+    def set_type(self, idx, node_type):
+        if self.types[idx] == self.untagged[idx]:
+            self.changed.append(idx)
+        self.types[idx] = NODE_TYPES.index(node_type)
+
+    def tag(self, node_type, num_nodes, rng=random, unblocked=False):
+        # same sampling as ChangeTagger.tag, the candidates are all nodes besides root and target in level order
+        if unblocked:
+            pool = [idx for idx in self.order[2:] if not self.blocked[idx]]
+        else:
+            unchanged = NODE_TYPES.index(NodeType.UNCHANGED)
+            pool = [idx for idx in self.order[2:] if self.types[idx] == unchanged]
+
+        if num_nodes > len(pool):
+            return set()
+
+        selection = set()
+        for idx in rng.sample(pool, num_nodes):
+            self.set_type(idx, node_type)
+            selection.add(idx)
+
+        return selection
+
+    def categorize(self):
+        # the change type of an edge only depends on the types of both ends, a lookup table indexed by
+        # source type * number of types + target type categorises all edges in one pass. Nodes and edges are listed by
+        # (source) node in listing order
+        num_types = len(NODE_TYPES)
+        table = [CHANGE_TYPES.index(get_change_type(source, target)) for source in NODE_TYPES for target in NODE_TYPES]
+
+        if numpy is not None:
+            order = numpy.frombuffer(self.order, dtype=numpy.int32)
+            offsets = numpy.frombuffer(self.offsets, dtype=numpy.int64)
+            counts = offsets[order + 1] - offsets[order]
+            sources = numpy.repeat(order, counts)
+            # position of every edge in 'targets', rows are stored by id
+            positions = numpy.arange(len(sources)) + numpy.repeat(offsets[order] - numpy.cumsum(counts) + counts, counts)
+            targets = numpy.frombuffer(self.targets, dtype=numpy.int32)[positions]
+            types = numpy.frombuffer(self.types, dtype=numpy.uint8).astype(numpy.int64)
+            codes = numpy.asarray(table)[types[sources] * num_types + types[targets]]
+            edges = [(sources[codes == code], targets[codes == code]) for code in range(len(CHANGE_TYPES))]
+            nodes = [order[types[order] == code] for code in range(num_types)]
+        else:
+            edges = [(array('i'), array('i')) for _ in CHANGE_TYPES]
+            for source in self.order:
+                for target in self.callees(source):
+                    sources, targets = edges[table[self.types[source] * num_types + self.types[target]]]
+                    sources.append(source)
+                    targets.append(target)
+            nodes = [array('i', (idx for idx in self.order if self.types[idx] == code)) for code in range(num_types)]
+
+        return {
+            'node': {node_type: CompactNodes(self, nodes[code]) for code, node_type in enumerate(NODE_TYPES)},
+            'changes': {change_type: CompactEdges(self, *edges[code]) for code, change_type in enumerate(CHANGE_TYPES)}
+        }
+
+
+class CompactNodes:
+    # nodes of a single type, iterates node objects just as the sets of the 'objects' backend
+    def __init__(self, graph, ids):
+        self.graph = graph
+        self.ids = ids
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __iter__(self):
+        for idx in self.ids.tolist():
+            yield self.graph.node(idx)
+
+
+class CompactEdges:
+    # edges of a single change type, iterates (source, target) node pairs just as the sets of the 'objects' backend
+    def __init__(self, graph, sources, targets):
+        self.graph = graph
+        self.sources = sources
+        self.targets = targets
+
+    def __len__(self):
+        return len(self.sources)
+
+    def __iter__(self):
+        for source, target in zip(self.sources.tolist(), self.targets.tolist()):
+            yield self.graph.node(source), self.graph.node(target)
+
+
 class Node:
-    def __init__(self, name, version=1, incoming=None, outgoing=None, node_type=NodeType.UNCHANGED, level=-1):
+    __slots__ = ('name', 'uid', 'version', 'incoming', 'outgoing', 'node_type', 'level')
+
+    def __init__(self, name, uid, version=1, incoming=None, outgoing=None, node_type=NodeType.UNCHANGED, level=-1):
         self.name = name
+        self.uid = uid
         self.version = version
         self.incoming = incoming if incoming is not None else set()
         self.outgoing = outgoing if outgoing is not None else set()
         self.node_type = node_type
         self.level = level
-        self.deviation = 0
-        self.cascaded_deviations = {}
+
+    # hashing by the unique id instead of the memory address keeps the iteration order of node (and edge) sets and
+    # therefore all random decisions and outputs identical between processes
+    def __hash__(self):
+        return self.uid
 
     def __str__(self):
         return f"{self.name}: {self.node_type.name} inc: [{','.join(n.name for n in self.incoming)}] out: [{','.join(n.name for n in self.outgoing)}] level: {self.level}]"
 
-    def print_with_deviation(self):
-        return f"{self.name}: {self.node_type.name} inc: [{','.join(n.name for n in self.incoming)}] out: [{','.join(n.name for n in self.outgoing)}] deviation: {self.deviation} cascaded: [{','.join(n.name + ': ' + str(d) for n,d in self.cascaded_deviations.items())}]"
+    def print_with_deviation(self, delays):
+        return f"{self.name}: {self.node_type.name} inc: [{','.join(n.name for n in self.incoming)}] out: [{','.join(n.name for n in self.outgoing)}] deviation: {delays.deviations.get(self, 0)} cascaded: [{','.join(n.name + ': ' + str(d) for n,d in delays.cascaded_deviations(self))}]"
 
     def get_json_entry(self, version_inc=False):
         return {
@@ -491,4 +1724,7 @@ class Node:
 
 
 if __name__ == '__main__':
-    run()
+    if len(sys.argv) > 2 and sys.argv[1] == 'convert':
+        convert_corpus(sys.argv[2:])
+    else:
+        generate()
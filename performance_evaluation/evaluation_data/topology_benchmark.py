@@ -0,0 +1,152 @@
+import os
+import io
+import csv
+import json
+import time
+import platform
+import sys
+import statistics
+import subprocess
+import tempfile
+from contextlib import redirect_stdout
+
+import topology
+
+# common.py is located in the root folder of the repository
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+import common
+
+# reproducible benchmark of topology.py: the graphs of every variant are generated with a fixed seed into a temporary
+# folder, wall time (median of all repetitions), allocation peak and size of every phase are appended to history_file
+# and compared with the last version recorded there
+benchmark_variants = ['broad', 'deep']
+depths = {}  # depths per variant, e.g. {'deep': [2, 3, 4]}, all depths of the variant in topology.py otherwise
+repetitions = 3
+
+# allocation peaks are traced in an additional run per graph, tracemalloc would distort the timed runs
+trace_memory = True
+
+seed = 2019
+history_file = 'topology_benchmark.csv'
+
+# further settings of topology.py, e.g. {'graph_backend': 'compact', 'output_format': 'bin'}
+topology_settings = {}
+
+SETTINGS = ['benchmark_variants', 'depths', 'repetitions', 'trace_memory', 'seed', 'history_file', 'topology_settings']
+
+HISTORY_COLUMNS = ['version', 'codeVersion', 'date', 'python', 'settings', 'variant', 'depth', 'overlay', 'phase',
+                   'calls', 'wall', 'peakMemory', 'nodes', 'edges']
+
+
+def benchmark(config=None):
+    # runs the benchmark with the settings above, overridden by the ones in config (e.g. {'benchmark_variants':
+    # ['deep'], 'depths': {'deep': [20, 21]}}). Settings are restored afterwards
+    previous = apply_settings(config or {})
+    try:
+        run()
+    finally:
+        apply_settings(previous)
+
+
+def apply_settings(config):
+    return common.apply_settings(globals(), SETTINGS, config)
+
+
+def run():
+    version = get_version()
+    settings = json.dumps(topology_settings, sort_keys=True)
+    print(f"Benchmarking topology.py at {version}", flush=True)
+
+    rows = []
+    for variant in benchmark_variants:
+        for depth in depths.get(variant, topology.variants[variant]['depths']):
+            timed = [profile_graph(variant, depth, trace=False) for _ in range(repetitions)]
+            traced = profile_graph(variant, depth, trace=True) if trace_memory else {}
+
+            for key, record in timed[0].items():
+                rows.append({
+                    'version': version, 'codeVersion': record['code_version'], 'date': time.strftime('%Y-%m-%d'),
+                    'python': platform.python_version(), 'settings': settings, 'variant': variant, 'depth': depth,
+                    'overlay': record['overlay'] or '', 'phase': record['phase'], 'calls': record['calls'],
+                    'wall': f"{statistics.median(run[key]['wall'] for run in timed):.6f}",
+                    'peakMemory': traced[key]['peakMemory'] if key in traced else '',
+                    'nodes': record['nodes'], 'edges': record['edges']
+                })
+            total = sum(float(row['wall']) for row in rows if row['variant'] == variant and row['depth'] == depth)
+            print(f"{variant} depth {depth}: {total:.3f}s", flush=True)
+
+    previous = load_previous_version(version, settings)
+    append_history(rows)
+    compare(previous, rows)
+
+
+def get_version():
+    # git revision of this folder ('-dirty' with local changes), the hash of topology.py without git
+    try:
+        return subprocess.run(['git', 'describe', '--always', '--dirty'], capture_output=True, check=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return topology.get_code_version()[:12]
+
+
+def profile_graph(variant, depth, trace):
+    # generates a single graph in a temporary folder, returns its profile records by overlay and phase
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        profile_file = os.path.join(tmp_dir, 'profile.ndjson')
+        settings = dict(topology_settings, seed=seed, selected_variants=[variant], processes=1,
+                        variants={variant: dict(topology.variants[variant], depths=[depth])}, cache_dir='',
+                        output_dir=os.path.join(tmp_dir, 'out'), profile_file=profile_file, profile_memory=trace)
+        # the statistics of every graph are not of interest here
+        with redirect_stdout(io.StringIO()):
+            topology.generate(settings)
+
+        with open(profile_file) as file:
+            records = [json.loads(line) for line in file]
+    return {(record['overlay'], record['phase']): record for record in records}
+
+
+def load_previous_version(version, settings):
+    # rows of the last version in the history other than the current one, benchmarked with the same settings
+    if not os.path.exists(history_file):
+        return []
+
+    with open(history_file, newline='') as file:
+        rows = [row for row in csv.DictReader(file) if row['settings'] == settings]
+    versions = [row['version'] for row in rows if row['version'] != version]
+    return [row for row in rows if versions and row['version'] == versions[-1]]
+
+
+def append_history(rows):
+    exists = os.path.exists(history_file)
+    with open(history_file, "a", newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=HISTORY_COLUMNS)
+        if not exists:
+            writer.writeheader()
+        writer.writerows(rows)
+
+
+def compare(previous, rows):
+    # total wall time per variant and phase over the depths benchmarked in both versions
+    if not previous:
+        print(f"No previous version in '{history_file}' to compare with")
+        return
+
+    print(f"\nCompared with {previous[0]['version']}:")
+    common = ({(row['variant'], int(row['depth'])) for row in previous} &
+              {(row['variant'], row['depth']) for row in rows})
+    totals = {}
+    for version, version_rows in (('previous', previous), ('current', rows)):
+        for row in version_rows:
+            if (row['variant'], int(row['depth'])) in common:
+                key = (row['variant'], row['phase'])
+                totals.setdefault(key, {'previous': 0.0, 'current': 0.0})[version] += float(row['wall'])
+
+    for (variant, phase), total in sorted(totals.items()):
+        change = f"{100 * (total['current'] / total['previous'] - 1):+.1f}%" if total['previous'] > 0 else "new"
+        print(f" |- {variant} {phase}: {total['previous']:.3f}s -> {total['current']:.3f}s ({change})")
+
+
+if __name__ == '__main__':
+    benchmark()
@@ -1,51 +1,182 @@
 import csv
+import io
+import os
+import re
+import sys
 
-graph_stats = {
-    'broad' : {},
-    'deep': {}
-}
+import numpy
 
-with open("graph_stats.csv", newline='') as csvfile:
-    reader = csv.DictReader(csvfile)
-    for row in reader:
-        # variant,type,depth,nodes,edges,calls
-        if row['type'] not in graph_stats[row['variant']]:
-            graph_stats[row['variant']][row['type']] = {}
+# common.py is located in the root folder of the repository
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+import common
 
-        if row['depth'] not in graph_stats[row['variant']][row['type']]:
-            graph_stats[row['variant']][row['type']][row['depth']] = {}
-
-        graph_stats[row['variant']][row['type']][row['depth']]['nodes'] = row['nodes']
-        graph_stats[row['variant']][row['type']][row['depth']]['edges'] = row['edges']
-        graph_stats[row['variant']][row['type']][row['depth']]['calls'] = row['calls']
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
 
 broad_file = "./stats/broad/result.txt"
 deep_file = "./stats/deep/result.txt"
 
 out_file = "overall_results.csv"
 
+# additional binary copy of the merged results: overall_results.parquet if pyarrow is installed, overall_results.npz
+# otherwise (compressed, string columns as codes into '<column>_values')
+binary_output = True
+
 variants = ["broad", "deep"]
 
-with open(out_file, "w") as out:
+graph_stats_file = "graph_stats.csv"
+
+SETTINGS = ['broad_file', 'deep_file', 'out_file', 'binary_output', 'variants', 'graph_stats_file']
+
+COLUMNS = ["strategyID", "endTime", "algorithmStartTime", "algorithmDuration", "startTime", "setupDuration", "duration",
+           "variation", "frequency", "depth", "deviation", "nodes", "edges", "calls",
+           "wallTime", "userTime", "systemTime", "peakMemory"]
+INTEGER_COLUMNS = COLUMNS[:7] + ["depth", "deviation", "nodes", "edges"]
+FLOAT_COLUMNS = ["calls", "wallTime", "userTime", "systemTime", "peakMemory"]
+# categorical columns, kept as codes into a table of their values
+STRING_COLUMNS = ["variation", "frequency"]
+
+# a result file holds strategyID, endTime, algorithmStartTime, algorithmDuration, startTime, setupDuration, duration,
+# path, wallTime, userTime, systemTime, peakMemory. All columns besides the graph path (column 7) are numbers
+RESULT_COLUMNS = COLUMNS[:7] + COLUMNS[14:]
+RESULT_DTYPE = [(name, numpy.int64 if name in INTEGER_COLUMNS else numpy.float64) for name in RESULT_COLUMNS]
+# a line of a result file without resource columns (older result files)
+MISSING_RESOURCES = re.compile(rb"^[^,\n]*(?:,[^,\n]*){7}$", re.MULTILINE)
+
+# text of the resource columns in the CSV file as logged by runner.py, calls keep their text of graph_stats_file
+FLOAT_FORMATS = {"wallTime": "%.3f", "userTime": "%.3f", "systemTime": "%.3f", "peakMemory": "%d"}
+CSV_CHUNK = 100000  # rows formatted at once
+
+
+def prepare(config=None):
+    # merges the results with the settings above, overridden by the ones in config (e.g. {'broad_file':
+    # 'broad.txt', 'variants': ['broad'], 'out_file': 'broad.csv'}). Settings are restored afterwards
+    previous = apply_settings(config or {})
+    try:
+        merge()
+    finally:
+        apply_settings(previous)
+
+
+def apply_settings(config):
+    return common.apply_settings(globals(), SETTINGS, config)
+
+
+def read_graph_stats():
+    # variant,type,depth,nodes,edges,calls as columns, the row of a graph is looked up by (variant, type, depth). The
+    # text of every calls value is kept for the CSV file
+    with open(graph_stats_file, newline='') as csvfile:
+        rows = list(csv.DictReader(csvfile))
+
+    index = {(row['variant'], row['type'], row['depth']): idx for idx, row in enumerate(rows)}
+    graph_stats = {'nodes': numpy.array([int(row['nodes']) for row in rows], dtype=numpy.int64),
+                   'edges': numpy.array([int(row['edges']) for row in rows], dtype=numpy.int64),
+                   'calls': numpy.array([float(row['calls']) for row in rows], dtype=numpy.float64),
+                   'calls_text': numpy.array([row['calls'] for row in rows], dtype=str)}
+    return index, graph_stats
 
-    out.write("strategyID,endTime,algorithmStartTime,algorithmDuration,startTime,setupDuration,duration,variation,frequency,depth,deviation,nodes,edges,calls\n")
-    for variant in variants:
-        print(f"preparing '{variant}' results:")
 
-        with open(broad_file if variant == "broad" else deep_file, "r") as file:
+def read_results(path):
+    # typed columns of a result file and the graph path of every run as code into the distinct paths. Resource
+    # columns are missing in older result files, they become NaN
+    with open(path, "rb") as file:
+        data = file.read()
+    if not data.strip():
+        return None, None
+    if data.count(b",") != 11 * (data.count(b"\n") + (not data.endswith(b"\n"))):
+        data = MISSING_RESOURCES.sub(rb"\g<0>,nan,nan,nan,nan", data)
 
-            for line in file:
-                content = line.split(",")
-                # strategyID, endTime, algorithmStartTime, algorithmDuration, startTime, setupDuration, duration, path
-                details = content[7].split("/")
+    results = numpy.loadtxt(io.BytesIO(data), delimiter=",", dtype=RESULT_DTYPE,
+                            usecols=[0, 1, 2, 3, 4, 5, 6, 8, 9, 10, 11], ndmin=1)
+    paths, graphs = numpy.unique(numpy.loadtxt(io.BytesIO(data), delimiter=",", dtype="S", usecols=7, ndmin=1),
+                                 return_inverse=True)
+    columns = {name: results[name] for name in RESULT_COLUMNS}
+    columns['graph'] = graphs.ravel()
+    return columns, [path.decode() for path in paths]
+
+
+def merge_results(variant, columns, paths, graph_stats, tables):
+    # joins the runs with the details of their graph: only the few distinct graph paths are parsed and looked up in
+    # graph_stats, every run then picks the details of its graph by code
+    index, stats = graph_stats
+    graphs = [common.parse_path(path) for path in paths]
+    for eval_type, _, _ in graphs:
+        if eval_type not in tables['frequency']:
+            tables['frequency'].append(eval_type)
+
+    rows = numpy.array([index[(variant, eval_type, str(depth))] for eval_type, depth, _ in graphs], dtype=numpy.intp)
+    details = {'frequency': numpy.array([tables['frequency'].index(eval_type) for eval_type, _, _ in graphs],
+                                        dtype=numpy.int8),
+               'depth': numpy.array([depth for _, depth, _ in graphs], dtype=numpy.int64),
+               'deviation': numpy.array([deviation for _, _, deviation in graphs], dtype=numpy.int64),
+               'nodes': stats['nodes'][rows], 'edges': stats['edges'][rows], 'calls': stats['calls'][rows],
+               'graph_stats_row': rows}
+
+    merged = {name: columns[name] for name in RESULT_COLUMNS}
+    merged['variation'] = numpy.full(len(columns['graph']), tables['variation'].index(variant), dtype=numpy.int8)
+    for name, values in details.items():
+        merged[name] = values[columns['graph']]
+    return merged
+
+
+def write_csv(columns, tables, calls_text):
+    # formatted in chunks of rows, the text of all runs never exists at once
+    line = ",".join("%d" if name in INTEGER_COLUMNS else "%s" for name in COLUMNS) + "\n"
+    values = {name: numpy.array(table) for name, table in tables.items()}
+
+    with open(out_file, "w") as out:
+        out.write(",".join(COLUMNS) + "\n")
+        for start in range(0, len(columns["strategyID"]) if columns else 0, CSV_CHUNK):
+            fields = []
+            for name in COLUMNS:
+                chunk = columns[name][start:start + CSV_CHUNK]
+                if name in STRING_COLUMNS:
+                    fields.append(values[name][chunk].tolist())
+                elif name == "calls":
+                    fields.append(calls_text[columns['graph_stats_row'][start:start + CSV_CHUNK]].tolist())
+                elif name in FLOAT_COLUMNS:
+                    fields.append(["" if value != value else FLOAT_FORMATS[name] % value for value in chunk.tolist()])
+                else:
+                    fields.append(chunk.tolist())
+            out.writelines(line % row for row in zip(*fields))
+
+
+def write_binary(columns, tables):
+    name = out_file.rsplit(".", 1)[0]
+    if pyarrow:
+        table = pyarrow.table({column: pyarrow.DictionaryArray.from_arrays(values, tables[column])
+                               if column in STRING_COLUMNS else pyarrow.array(values)
+                               for column, values in columns.items()})
+        pyarrow.parquet.write_table(table, name + ".parquet")
+    else:
+        numpy.savez_compressed(name + ".npz", **columns,
+                               **{f"{column}_values": numpy.array(tables[column]) for column in STRING_COLUMNS})
+
+
+def merge():
+    graph_stats = read_graph_stats()
+    tables = {'variation': list(variants), 'frequency': []}
+    results = []
+
+    for variant in variants:
+        print(f"preparing '{variant}' results:")
+        columns, paths = read_results(broad_file if variant == "broad" else deep_file)
+        if columns is not None:
+            results.append(merge_results(variant, columns, paths, graph_stats, tables))
 
-                # evaluation_data/low/out_2 /graph_0.json
-                eval_type = details[1]
-                depth = details[2].split("_")[1]
-                deviation = details[3][6:].split('.')[0]
+    # the row of every run in graph_stats_file is only used for the text of its calls in the CSV file
+    columns = {name: numpy.concatenate([merged[name] for merged in results])
+               for name in COLUMNS + ['graph_stats_row']} if results else {}
+    del results
+    write_csv(columns, tables, graph_stats[1]['calls_text'])
+    if binary_output and columns:
+        write_binary({name: columns[name] for name in COLUMNS}, tables)
 
-                nodes = graph_stats[variant][eval_type][depth]['nodes']
-                edges = graph_stats[variant][eval_type][depth]['edges']
-                calls = graph_stats[variant][eval_type][depth]['calls']
 
-                out.write(",".join(content[:-1]) + "," + f"{variant},{eval_type},{depth},{deviation},{nodes},{edges},{calls}\n")
\ No newline at end of file
+if __name__ == '__main__':
+    prepare()
@@ -1,5 +1,21 @@
 import subprocess
+import sys
 import time
+import json
+import os
+import queue
+import threading
+import math
+import statistics
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'evaluation_data'))
+import topology
+
+# common.py is located in the root folder of the repository
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+import common
 
 result_file = 'result.txt'
 
@@ -14,14 +30,432 @@ types = ['low', 'midlow', 'midhigh', 'high']
 
 strategies = [i for i in range(0,12)]
 
-print("Starting monitoring helper")
-monitoring = subprocess.Popen(args=['node', 'dist/monitoring.js', 'utilization.txt', '500'])
+# output format of the difference graphs, see 'output_format' in topology.py
+# 'json', 'json.gz', 'ndjson', 'ndjson.gz' or 'bin', summaries are gzipped (binary) along with the graphs
+graph_format = 'json'
+
+# 'delta' for graphs generated with deviation_output = 'delta' in topology.py
+deviation_output = 'full'
+
+# 'process' starts a node process (dist/app.js) per run, 'worker' keeps a single node process (dist/worker.js) alive
+# that reads every graph only once and runs all strategies and repetitions on it
+execution_mode = 'process'
+
+# number of runs (process mode) or graphs (worker mode) benchmarked in parallel. Every parallel worker is pinned to a
+# core of its own, jobs are scheduled largest graphs first
+parallel_workers = 1
+cpu_cores = None  # cores used for pinning, e.g. [1, 2, 3], None uses all available cores
+
+# adaptive repetitions: instead of a fixed number of repetitions every (type, step, strategy, deviation) is repeated until
+# the 95% confidence interval of algorithmDuration is narrower than target_ci_width (relative to the mean), but at least
+# min_repetitions and at most max_repetitions times. Warm-up runs are not logged. Mean, median, p95 and confidence
+# interval per configuration are written to <result_file>.summary.csv
+adaptive_repetitions = False
+min_repetitions = 5
+max_repetitions = 50
+warmup_repetitions = 1
+target_ci_width = 0.05
+
+# locate the graphs through the cache of evaluation_data/topology.py (its cache_dir) instead of using downloaded ones:
+# every type is generated with its change types below and the topology.py settings in graph_settings, graphs missing in
+# the cache are generated before benchmarking and evaluation_data/{type}/out_{step} is linked to their cache entry.
+# Graph format, deviation output and deviation probabilities of the graphs are the ones above. None uses the folders in
+# evaluation_data as they are
+graph_cache = None  # e.g. 'evaluation_data/cache'
+graph_variant = 'broad'  # 'broad' or 'deep', see 'variants' in topology.py
+graph_settings = {}  # e.g. {'seed': 7}
+type_change_types = {'low': {'removed': 2, 'added': 2, 'updated': 2},
+                     'midlow': {'removed': 5, 'added': 5, 'updated': 10},
+                     'midhigh': {'removed': 10, 'added': 15, 'updated': 15},
+                     'high': {'removed': 20, 'added': 20, 'updated': 25}}
+
+# machine-wide CPU and memory utilization (dist/monitoring.js, every 500ms) logged to utilization.txt. Resources of every
+# single run (wall time, user and system CPU time in ms, peak resident memory in KB) are always appended to its line
+# in the result file
+utilization_monitoring = False
+
+# skip runs that are already logged in the result file, an interrupted benchmark is restarted with the same parameters
+# and only executes the missing runs
+resume = True
+
+SETTINGS = ['result_file', 'repetitions', 'deviation_probabilities', 'steps', 'types', 'strategies', 'graph_format',
+            'deviation_output', 'execution_mode', 'parallel_workers', 'cpu_cores', 'adaptive_repetitions',
+            'min_repetitions', 'max_repetitions', 'warmup_repetitions', 'target_ci_width', 'graph_cache', 'graph_variant',
+            'graph_settings', 'type_change_types', 'utilization_monitoring', 'resume']
+
+
+def run_benchmarks(plan=None):
+    # executes all benchmarks with the settings above, overridden by the ones in plan (e.g. {'types': ['low'],
+    # 'steps': [2, 3], 'result_file': 'low.txt'}). Settings are restored afterwards, several plans can be executed one
+    # after another in the same process
+    previous = apply_settings(plan or {})
+    try:
+        benchmark()
+    finally:
+        apply_settings(previous)
+
+
+def apply_settings(plan):
+    return common.apply_settings(globals(), SETTINGS, plan)
+
 
-print("Waiting 5 secs to start benchmarking...")
-time.sleep(5)
+def benchmark():
+    global logged_runs, summaries, summary_lock
+    if graph_cache:
+        locate_graphs()
+    logged_runs = load_logged_runs()
+    summaries = load_summaries()
+    summary_lock = threading.Lock()
+    write_manifest()
 
-for rep in range(0, repetitions):
-    print(f"Start repetition: {rep+1}", flush=True)
+    if utilization_monitoring:
+        print("Starting monitoring helper")
+        monitoring = subprocess.Popen(args=['node', 'dist/monitoring.js', 'utilization.txt', '500'])
+        # the monitor records the utilization of the idle machine before the first run
+        print("Waiting 5 secs to start benchmarking...")
+        time.sleep(5)
+
+    if parallel_workers > 1:
+        run_parallel_benchmarks()
+    elif execution_mode == 'worker' or adaptive_repetitions:
+        run_graph_benchmarks()
+    else:
+        run_process_benchmarks()
+
+    if adaptive_repetitions:
+        write_summaries()
+
+    if utilization_monitoring:
+        print("Benchmarking done, stopping monitoring")
+        monitoring.terminate()
+        time.sleep(5)
+    else:
+        print("Benchmarking done")
+
+
+def locate_graphs():
+    # generates graphs missing in the cache and links evaluation_data/{type}/out_{step} to their cache entries, results
+    # keep referring to the same paths
+    settings = dict(graph_settings, cache_dir=graph_cache, output_format=graph_format, deviation_output=deviation_output,
+                    deviation_probabilities=deviation_probabilities)
+    variant_settings = dict(settings.get('variants', topology.variants)[graph_variant], depths=steps)
+    topology.generate(dict(settings, selected_variants=[graph_variant], variants={graph_variant: variant_settings},
+                           sweep_change_types=[type_change_types[type] for type in types]))
+
+    for type in types:
+        for step in steps:
+            path = topology.locate(graph_variant, step, dict(settings, change_types=type_change_types[type]))
+            if path is None:
+                raise FileNotFoundError(f"no {graph_variant} graph of type '{type}' and depth {step} in "
+                                        f"'{graph_cache}', it could not be generated")
+            link = f"evaluation_data/{type}/out_{step}"
+            if os.path.islink(link):
+                os.remove(link)
+            elif os.path.exists(link):
+                raise FileExistsError(f"'{link}' is not a link into the graph cache, move it to use '{graph_cache}'")
+            os.makedirs(os.path.dirname(link), exist_ok=True)
+            os.symlink(os.path.relpath(path, os.path.dirname(link)), link)
+
+
+def get_summary_path(type, step):
+    if graph_format == 'bin':
+        return f"evaluation_data/{type}/out_{step}/summary.bin"
+    summary_file = 'summary.json.gz' if graph_format.endswith('.gz') else 'summary.json'
+    return f"evaluation_data/{type}/out_{step}/{summary_file}"
+
+
+def get_graph_path(type, step, deviation):
+    if deviation_output == 'delta' and deviation != 0:
+        return f"evaluation_data/{type}/out_{step}/graph_{deviation}.delta.json{'.gz' if graph_format.endswith('.gz') else ''}"
+    return f"evaluation_data/{type}/out_{step}/graph_{deviation}.{graph_format}"
+
+
+def run_benchmark(worker, rep, type, step, strategy, deviation, warmup=False):
+    summary_path = get_summary_path(type, step)
+    interaction_path = get_graph_path(type, step, deviation)
+    log_path = f"logs/log_{type}_{step}_{strategy}_{deviation}.json"
+
+    if not warmup and rep < len(logged_runs.get((strategy, interaction_path), [])):
+        return None
+
+    if worker:
+        line, resources = run_in_worker(worker, strategy, interaction_path, summary_path, log_path)
+    else:
+        line, resources = run_app(strategy, interaction_path, summary_path, log_path)
+
+    if line:
+        # strategyID, endTime, algorithmStartTime, algorithmDuration, startTime, setupDuration, duration, path,
+        # wallTime, userTime, systemTime, peakMemory
+        line = line.rstrip("\n") + "," + ",".join(resources) + "\n"
+
+        if not warmup:
+            append_result(line)
+    return line
+
+
+def run_repetitions(worker, type, step, strategy, deviation):
+    if adaptive_repetitions:
+        run_adaptive_repetitions(worker, type, step, strategy, deviation)
+    else:
+        for rep in range(0, repetitions):
+            run_benchmark(worker, rep, type, step, strategy, deviation)
+
+
+def run_adaptive_repetitions(worker, type, step, strategy, deviation):
+    # logged runs of an interrupted benchmark count as well
+    durations = list(logged_runs.get((strategy, get_graph_path(type, step, deviation)), []))
+
+    if not is_precise(durations):
+        for _ in range(0, warmup_repetitions):
+            run_benchmark(worker, 0, type, step, strategy, deviation, warmup=True)
+
+    while not is_precise(durations):
+        line = run_benchmark(worker, len(durations), type, step, strategy, deviation)
+        if not line:
+            print(f"Run failed, stopping after {len(durations)} repetitions", flush=True)
+            break
+        durations.append(float(line.split(",")[3]))
+
+    if durations:
+        add_summary(type, step, strategy, deviation, durations)
+
+
+def get_confidence_interval(durations):
+    # 95% confidence interval of the mean based on Student's t-distribution
+    mean = statistics.mean(durations)
+    if len(durations) < 2:
+        return mean, mean
+    half_width = get_t_quantile(len(durations) - 1) * statistics.stdev(durations) / math.sqrt(len(durations))
+    return mean - half_width, mean + half_width
+
+
+def get_t_quantile(df):
+    # 97.5% quantile of Student's t-distribution, tabulated up to 30 degrees of freedom. Beyond that it is expanded
+    # from the normal quantile in powers of 1/df (Abramowitz and Stegun 26.7.5), exact to four decimals
+    if df <= len(T_QUANTILES):
+        return T_QUANTILES[df - 1]
+    z = statistics.NormalDist().inv_cdf(0.975)
+    return (z + (z ** 3 + z) / (4 * df) + (5 * z ** 5 + 16 * z ** 3 + 3 * z) / (96 * df ** 2)
+            + (3 * z ** 7 + 19 * z ** 5 + 17 * z ** 3 - 15 * z) / (384 * df ** 3))
+
+
+def is_precise(durations):
+    if len(durations) >= max_repetitions:
+        return True
+    if len(durations) < min_repetitions:
+        return False
+
+    low, high = get_confidence_interval(durations)
+    mean = statistics.mean(durations)
+    return high - low == 0 or (mean > 0 and (high - low) / mean <= target_ci_width)
+
+
+def add_summary(type, step, strategy, deviation, durations):
+    ordered = sorted(durations)
+    low, high = get_confidence_interval(durations)
+    row = [type, step, deviation, strategy, len(durations), f"{statistics.mean(durations):.3f}",
+           f"{statistics.median(durations):.3f}", f"{ordered[math.ceil(0.95 * len(ordered)) - 1]:.3f}",
+           f"{low:.3f}", f"{high:.3f}"]
+
+    with summary_lock:
+        summaries[(type, str(step), str(deviation), str(strategy))] = ",".join(str(value) for value in row)
+        if not os.path.exists(f"{result_file}.summary.csv"):
+            with open(f"{result_file}.summary.csv", "w") as file:
+                file.write(SUMMARY_HEADER)
+        # appended right away, rewritten without outdated rows of resumed configurations at the end (write_summaries)
+        with open(f"{result_file}.summary.csv", "a") as file:
+            file.write(summaries[(type, str(step), str(deviation), str(strategy))] + "\n")
+
+
+def load_summaries():
+    loaded = {}
+    if resume and os.path.exists(f"{result_file}.summary.csv"):
+        with open(f"{result_file}.summary.csv", "r") as file:
+            next(file, None)
+            for line in file:
+                if line.endswith("\n"):
+                    loaded[tuple(line.split(",")[:4])] = line.rstrip("\n")
+    return loaded
+
+
+def write_summaries():
+    with open(f"{result_file}.summary.csv.tmp", "w") as file:
+        file.write(SUMMARY_HEADER)
+        for row in summaries.values():
+            file.write(row + "\n")
+    os.replace(f"{result_file}.summary.csv.tmp", f"{result_file}.summary.csv")
+
+
+def run_app(strategy, interaction_path, summary_path, log_path):
+    # app.js logs into a file of its own first, the result file only ever receives complete lines (append_result)
+    scratch_file = f"{result_file}.{threading.get_ident()}.part"
+    if os.path.exists(scratch_file):
+        os.remove(scratch_file)
+
+    # waiting for the process with wait4 provides the resource usage of exactly this process
+    start = time.perf_counter()
+    process = subprocess.Popen(args=['node', 'dist/app.js', str(strategy), interaction_path, summary_path, scratch_file, log_path])
+    _, status, usage = os.wait4(process.pid, 0)
+    wall_time = time.perf_counter() - start
+    process.returncode = os.waitstatus_to_exitcode(status)
+
+    resources = [f"{wall_time * 1000:.3f}", f"{usage.ru_utime * 1000:.3f}", f"{usage.ru_stime * 1000:.3f}",
+                 str(usage.ru_maxrss)]
+
+    if not os.path.exists(scratch_file):
+        return None, resources
+
+    with open(scratch_file, "r") as file:
+        line = file.read()
+    os.remove(scratch_file)
+    return line if line.endswith("\n") else None, resources
+
+
+def append_result(line):
+    # a single write on a file opened for appending, parallel workers never interleave and an interrupted benchmark
+    # leaves at most a partial last line behind, which is removed by load_logged_runs
+    fd = os.open(result_file, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, line.encode())
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def load_logged_runs():
+    # algorithmDuration of all logged repetitions per (strategy, graph). Repetitions are interchangeable: repetition
+    # rep of a run is completed if more than rep lines of it are logged
+    logged = {}
+    if not resume or not os.path.exists(result_file):
+        return logged
+
+    with open(result_file, "rb+") as file:
+        content = file.read()
+        end = content.rfind(b"\n") + 1
+        if end < len(content):
+            print(f"Removing incomplete last line of {result_file}", flush=True)
+            file.truncate(end)
+
+    for line in content[:end].decode().splitlines():
+        # strategyID, endTime, algorithmStartTime, algorithmDuration, startTime, setupDuration, duration, path
+        fields = line.split(",")
+        logged.setdefault((int(fields[0]), fields[7]), []).append(float(fields[3]))
+
+    return logged
+
+
+def write_manifest():
+    # parameters of the runs logged in the result file, resuming with other parameters only skips runs part of both.
+    # With adaptive repetitions the number of runs per configuration is only bounded by min and max_repetitions
+    manifest = {'repetitions': repetitions, 'adaptive_repetitions': adaptive_repetitions, 'types': types, 'steps': steps,
+                'strategies': strategies, 'deviation_probabilities': deviation_probabilities,
+                'graph_format': graph_format, 'deviation_output': deviation_output, 'execution_mode': execution_mode}
+    if adaptive_repetitions:
+        del manifest['repetitions']
+        manifest.update(min_repetitions=min_repetitions, max_repetitions=max_repetitions,
+                        target_ci_width=target_ci_width)
+    manifest_file = f"{result_file}.manifest.json"
+
+    if os.path.exists(manifest_file):
+        with open(manifest_file, "r") as file:
+            if json.load(file) != manifest:
+                print(f"Parameters differ from {manifest_file}, resuming with the new parameters", flush=True)
+
+    with open(manifest_file, "w") as file:
+        json.dump(manifest, file, indent=2)
+
+    configurations = len(types) * len(steps) * len(strategies) * len(deviation_probabilities)
+    limit = max_repetitions if adaptive_repetitions else repetitions
+    done = sum(min(limit, len(logged_runs.get((strategy, get_graph_path(type, step, deviation)), [])))
+               for type in types for step in steps for strategy in strategies for deviation in deviation_probabilities)
+    if adaptive_repetitions:
+        print(f"{done} runs already completed, {min_repetitions * configurations} to {max_repetitions * configurations}"
+              f" runs in total", flush=True)
+    else:
+        print(f"{done} of {repetitions * configurations} runs already completed", flush=True)
+
+
+class Worker:
+    # a node process (dist/worker.js) kept alive for many runs. A process that died (crashed or killed, e.g. running out
+    # of memory) is replaced by a new one, the remaining runs of a graph are not lost
+    def __init__(self):
+        self.process = self.start()
+
+    def start(self):
+        return subprocess.Popen(args=['node', 'dist/worker.js'], stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                universal_newlines=True, bufsize=1)
+
+    def restart(self):
+        # returns the exit code of the dead process
+        returncode = self.close()
+        self.process = self.start()
+        return returncode
+
+    def close(self):
+        try:
+            self.process.stdin.close()
+        except BrokenPipeError:
+            pass
+        self.process.stdout.close()
+        return self.process.wait()
+
+
+def run_in_worker(worker, strategy, interaction_path, summary_path, log_path):
+    # one run per line, the worker answers with the timings of the run, the result line is written here
+    if worker.process.poll() is not None:
+        print(f"Worker exited with code {worker.restart()}, starting a new one", flush=True)
+
+    reset_peak_memory(worker.process.pid)
+    start = time.perf_counter()
+    try:
+        worker.process.stdin.write(json.dumps({'strategy': strategy, 'graph': interaction_path,
+                                               'summary': summary_path, 'log': log_path}) + "\n")
+        worker.process.stdin.flush()
+        answer = worker.process.stdout.readline()
+    except BrokenPipeError:
+        answer = ""
+    wall_time = time.perf_counter() - start
+
+    if not answer.endswith("\n"):
+        # end of output, the worker died during this run. The run fails, the next one is run by a new worker
+        print(f"Run failed: worker exited with code {worker.restart()}", flush=True)
+        return None, []
+
+    response = json.loads(answer)
+
+    if 'error' in response:
+        print(f"Run failed: {response['error']}", flush=True)
+        return None, []
+
+    # the worker measures its own CPU time per run (process.cpuUsage, microseconds)
+    resources = [f"{wall_time * 1000:.3f}", f"{response['cpuUser'] / 1000:.3f}", f"{response['cpuSystem'] / 1000:.3f}",
+                 read_peak_memory(worker.process.pid)]
+
+    return ",".join(str(response[field]) for field in ['strategyID', 'endTime', 'algorithmStartTime',
+                                                       'algorithmDuration', 'startTime', 'setupDuration',
+                                                       'duration', 'path']) + "\n", resources
+
+
+def reset_peak_memory(pid):
+    # writing 5 to clear_refs resets the peak resident memory (VmHWM) of a process, requires Linux >= 4.0
+    try:
+        with open(f"/proc/{pid}/clear_refs", "w") as file:
+            file.write("5")
+    except OSError:
+        pass
+
+
+def read_peak_memory(pid):
+    with open(f"/proc/{pid}/status", "r") as file:
+        for line in file:
+            if line.startswith("VmHWM:"):
+                return line.split()[1]
+    return ""
+
+
+def run_graph_benchmarks():
+    # graph by graph, all strategies and repetitions on a graph are executed consecutively
+    worker = Worker() if execution_mode == 'worker' else None
 
     for type in types:
         print(f"Type: {type}", flush=True)
@@ -29,18 +463,119 @@ for rep in range(0, repetitions):
         for step in steps:
             print(f"Trace depth: {step}", flush=True)
 
-            summary_path = f"evaluation_data/{type}/out_{step}/summary.json"
+            summary_path = get_summary_path(type, step)
             print(f"summary-path: {summary_path}", flush=True)
-            for strategy in strategies:
-                print(f"Run strategy: {strategy}", flush=True)
+            for deviation in deviation_probabilities:
+                print(f"Graph: {get_graph_path(type, step, deviation)}", flush=True)
 
-                for deviation in deviation_probabilities:
-                    interaction_path = f"evaluation_data/{type}/out_{step}/graph_{deviation}.json"
-                    subprocess.call(args=['node', 'dist/app.js', str(strategy), interaction_path, summary_path, result_file, f"logs/log_{type}_{step}_{strategy}_{deviation}.json"])
+                for strategy in strategies:
+                    run_repetitions(worker, type, step, strategy, deviation)
             print("---", flush=True)
         print("---------", flush=True)
-    print("~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~", flush=True)
 
-print("Benchmarking done, stopping monitoring")
-monitoring.terminate()
-time.sleep(5)
+    if worker:
+        worker.close()
+
+
+def run_process_benchmarks():
+    for rep in range(0, repetitions):
+        print(f"Start repetition: {rep+1}", flush=True)
+
+        for type in types:
+            print(f"Type: {type}", flush=True)
+
+            for step in steps:
+                print(f"Trace depth: {step}", flush=True)
+
+                summary_path = get_summary_path(type, step)
+                print(f"summary-path: {summary_path}", flush=True)
+                for strategy in strategies:
+                    print(f"Run strategy: {strategy}", flush=True)
+
+                    for deviation in deviation_probabilities:
+                        run_benchmark(None, rep, type, step, strategy, deviation)
+                print("---", flush=True)
+            print("---------", flush=True)
+        print("~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~", flush=True)
+
+
+def get_parallel_jobs():
+    if execution_mode == 'worker':
+        # a worker reads a graph only once, all strategies and repetitions on a graph form a single job
+        jobs = [(type, step, deviation) for type in types for step in steps for deviation in deviation_probabilities]
+    elif adaptive_repetitions:
+        # the number of repetitions is only known while running them
+        jobs = [(type, step, deviation, strategy) for type in types for step in steps for strategy in strategies
+                for deviation in deviation_probabilities]
+    else:
+        jobs = [(type, step, deviation, strategy, rep) for rep in range(0, repetitions) for type in types
+                for step in steps for strategy in strategies for deviation in deviation_probabilities]
+
+    # starting with the largest graphs (by the size of their files, in delta output the one of the graph without
+    # deviations) keeps the tail of the schedule short
+    sizes = {job[:3]: get_graph_size(*job[:3]) for job in jobs}
+    jobs.sort(key=lambda job: (sizes[job[:3]], job[1]), reverse=True)
+    return jobs
+
+
+def get_graph_size(type, step, deviation):
+    path = get_graph_path(type, step, 0 if deviation_output == 'delta' else deviation)
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+
+def run_parallel_worker(jobs, core):
+    # affinity is set per thread and inherited by every process started from this thread, the node processes never
+    # run outside of their core
+    os.sched_setaffinity(0, {core})
+    worker = Worker() if execution_mode == 'worker' else None
+
+    while True:
+        try:
+            job = jobs.get_nowait()
+        except queue.Empty:
+            break
+
+        type, step, deviation = job[:3]
+        print(f"Core {core}: {get_graph_path(type, step, deviation)}", flush=True)
+
+        if worker:
+            for strategy in strategies:
+                run_repetitions(worker, type, step, strategy, deviation)
+        elif adaptive_repetitions:
+            run_repetitions(None, type, step, job[3], deviation)
+        else:
+            run_benchmark(None, job[4], type, step, job[3], deviation)
+
+    if worker:
+        worker.close()
+
+
+def run_parallel_benchmarks():
+    cores = sorted(cpu_cores if cpu_cores else os.sched_getaffinity(0))
+    if parallel_workers > len(cores):
+        print(f"Only {len(cores)} cores available for {parallel_workers} workers, workers share cores", flush=True)
+
+    jobs = queue.Queue()
+    for job in get_parallel_jobs():
+        jobs.put(job)
+
+    threads = [threading.Thread(target=run_parallel_worker, args=(jobs, cores[idx % len(cores)]))
+               for idx in range(0, parallel_workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+T_QUANTILES = [12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228, 2.201, 2.179, 2.160, 2.145, 2.131,
+               2.120, 2.110, 2.101, 2.093, 2.086, 2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042]
+SUMMARY_HEADER = "type,depth,deviation,strategyID,runs,mean,median,p95,ciLow,ciHigh\n"
+
+# state of the running benchmark, see benchmark()
+logged_runs = {}
+summaries = {}
+summary_lock = threading.Lock()
+
+
+if __name__ == '__main__':
+    run_benchmarks()
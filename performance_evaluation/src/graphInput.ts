@@ -0,0 +1,203 @@
+import {DiffType, Edge} from "./types/types";
+import {CommonCall, DiffCall, UpdatedSourceVersion, UpdatedTargetVersion, UpdatedVersion} from "./types/callTypes";
+import {SimulatedComparison, SimulatedSimpleStatistics} from "./types/statisticTypes";
+import * as fs from "fs";
+import * as path from "path";
+import * as zlib from "zlib";
+
+/* helper functions for preparing input data */
+export function readDocument(file_path: string): string {
+    let content = fs.readFileSync(file_path);
+    return (file_path.endsWith('.gz') ? zlib.gunzipSync(content) : content).toString('utf-8');
+}
+
+export function readSummary(summary_path: string): any {
+    return summary_path.endsWith('.bin') ? readBinaryDocument(summary_path) : JSON.parse(readDocument(summary_path));
+}
+
+export function readInteractionGraph(graph_path: string): any {
+    if (graph_path.endsWith('.bin')) {
+        return readBinaryDocument(graph_path);
+    }
+
+    if (graph_path.indexOf('.delta.json') !== -1) {
+        // deviation variant stored as delta of its base graph: [index, maxDeviation] of every critical edge
+        let delta = JSON.parse(readDocument(graph_path));
+        let base_graph = readInteractionGraph(path.join(path.dirname(graph_path), delta.base));
+
+        Object.keys(delta.stats).forEach(change => {
+            delta.stats[change].forEach((critical: number[]) => {
+                base_graph[change][critical[0]].stats = {critical: true, maxDeviation: critical[1]};
+            });
+        });
+
+        return base_graph;
+    }
+
+    let content = readDocument(graph_path);
+
+    if (graph_path.indexOf('.ndjson') === -1) {
+        return JSON.parse(content);
+    }
+
+    // newline-delimited graphs contain a single change per line, tagged with its change category
+    let interaction_graph: any = {};
+    ['calling_new_ep', 'calling_ex_ep', 'removing', 'common', 'updated_caller', 'updated_callee', 'updated_version']
+        .forEach(change => interaction_graph[change] = []);
+
+    content.split('\n').forEach(line => {
+        if (line.length > 0) {
+            let entry = JSON.parse(line);
+            interaction_graph[entry.change].push(entry);
+        }
+    });
+
+    return interaction_graph;
+}
+
+// binary graphs and summaries of topology.py (output_format 'bin'): 8 bytes magic, uint32 length of a json header
+// describing all little-endian arrays (dtype, shape, offset) and the arrays, see BinaryWriter in topology.py. The
+// arrays are decoded to the same document JSON.parse returns for the json variants
+function readBinaryDocument(file_path: string): any {
+    let content = fs.readFileSync(file_path);
+    let header_length = content.readUInt32LE(8);
+    let header = JSON.parse(content.toString('utf-8', 12, 12 + header_length));
+    let start = 12 + header_length;
+
+    let read = (name: string): number[] => {
+        let layout = header.arrays[name];
+        let count = layout.shape.reduce((a: number, b: number) => a * b, 1);
+        let offset = start + layout.offset;
+        let values: number[] = new Array(count);
+        for (let i = 0; i < count; i++) {
+            if (layout.dtype === '|u1') {
+                values[i] = content.readUInt8(offset + i);
+            } else if (layout.dtype === '<i4') {
+                values[i] = content.readInt32LE(offset + 4 * i);
+            } else {
+                values[i] = content.readUInt32LE(offset + 8 * i) + content.readInt32LE(offset + 8 * i + 4) * 4294967296;
+            }
+        }
+        return values;
+    };
+
+    let blob = start + header.arrays['strings'].offset;
+    let string_offsets = read('stringOffsets');
+    let strings: string[] = [];
+    for (let i = 0; i < string_offsets.length - 1; i++) {
+        strings.push(content.toString('utf-8', blob + string_offsets[i], blob + string_offsets[i + 1]));
+    }
+
+    // service, version and endpoint of every entry as string index, -1 for fields the entry does not have
+    let entries = read('entries');
+    let entry = (idx: number): any => {
+        let result: any = {};
+        ['service', 'version', 'endpoint'].forEach((field, pos) => {
+            if (entries[3 * idx + pos] !== -1) {
+                result[field] = strings[entries[3 * idx + pos]];
+            }
+        });
+        return result;
+    };
+
+    if (header.kind === 'summary') {
+        let summary: any = {diff_summary: {}};
+        Object.keys(header.arrays).forEach(name => {
+            if (name.indexOf('diff_summary.') === 0) {
+                summary.diff_summary[name.substring('diff_summary.'.length)] = read(name).map(entry);
+            }
+        });
+        summary.endpoints = read('endpoints').map(entry);
+        return summary;
+    }
+
+    let interaction_graph: any = {};
+    ['calling_new_ep', 'calling_ex_ep', 'removing', 'common', 'updated_caller', 'updated_callee', 'updated_version']
+        .forEach(change => {
+            let edges = read(change + '.edges');
+            let comparable = (change + '.critical') in header.arrays;
+            let critical = comparable ? read(change + '.critical') : [];
+            let deviations = comparable ? read(change + '.maxDeviation') : [];
+            let old_versions = comparable ? read(change + '.oldVersions') : [];
+
+            interaction_graph[change] = [];
+            for (let i = 0; i < edges.length / 2; i++) {
+                let call: any = {source: entry(edges[2 * i]), target: entry(edges[2 * i + 1])};
+                if (comparable) {
+                    if (old_versions[2 * i] !== -1) {
+                        call.oldSourceVersion = strings[old_versions[2 * i]];
+                    }
+                    if (old_versions[2 * i + 1] !== -1) {
+                        call.oldTargetVersion = strings[old_versions[2 * i + 1]];
+                    }
+                    call.stats = {critical: critical[i] === 1, maxDeviation: deviations[i]};
+                }
+                interaction_graph[change].push(call);
+            }
+        });
+
+    return interaction_graph;
+}
+
+export function prepareEdgeDictionary(edge_dict: Map<string, Map<string, Edge>>, graph_path: string): void {
+    fillEdgeDictionary(edge_dict, readInteractionGraph(graph_path));
+}
+
+export function fillEdgeDictionary(edge_dict: Map<string, Map<string, Edge>>, interaction_graph: any): void {
+
+    interaction_graph['calling_new_ep'].forEach((entry: any) => {
+        let edge: Edge = getEdge(entry, edge_dict);
+        edge.addCall(new DiffCall(entry.source, entry.target, DiffType.ADD_CALL_TO_NEW_SERVICE,
+            new SimulatedSimpleStatistics()));
+    });
+
+    interaction_graph['calling_ex_ep'].forEach((entry: any) => {
+        let edge: Edge = getEdge(entry, edge_dict);
+        edge.addCall(new DiffCall(entry.source, entry.target, DiffType.ADD_CALL_TO_EXISTING_ENDPOINT,
+            new SimulatedSimpleStatistics()));
+    });
+
+    interaction_graph['removing'].forEach((entry: any) => {
+        let edge: Edge = getEdge(entry, edge_dict);
+        edge.addCall(new DiffCall(entry.source, entry.target, DiffType.REMOVE_CALL, new SimulatedSimpleStatistics()));
+    });
+
+    interaction_graph['common'].forEach((entry: any) => {
+        let edge: Edge = getEdge(entry, edge_dict);
+        edge.addCall(new CommonCall(entry.source, entry.target,
+            new SimulatedComparison(entry.stats.critical, entry.stats.maxDeviation)));
+    });
+
+    interaction_graph['updated_caller'].forEach((entry: any) => {
+        let edge: Edge = getEdge(entry, edge_dict);
+        edge.addCall(new UpdatedSourceVersion(entry.source, entry.target, entry.oldSourceVersion,
+            new SimulatedComparison(entry.stats.critical, entry.stats.maxDeviation)));
+    });
+
+    interaction_graph['updated_callee'].forEach((entry: any) => {
+        let edge: Edge = getEdge(entry, edge_dict);
+        edge.addCall(new UpdatedTargetVersion(entry.source, entry.target, entry.oldTargetVersion,
+            new SimulatedComparison(entry.stats.critical, entry.stats.maxDeviation)));
+    });
+
+    interaction_graph['updated_version'].forEach((entry: any) => {
+        let edge: Edge = getEdge(entry, edge_dict);
+        edge.addCall(new UpdatedVersion(entry.source, entry.target, entry.oldSourceVersion, entry.oldTargetVersion,
+            new SimulatedComparison(entry.stats.critical, entry.stats.maxDeviation)));
+    });
+}
+
+function getEdge(entry: any, edge_dict: Map<string, Map<string, Edge>>) : any {
+
+    if(!edge_dict.has(entry.source.service)) {
+        edge_dict.set(entry.source.service, new Map<string, Edge>());
+    }
+    // !. => non-null assertion operator, we know based on the block before that the key exists
+    if(!edge_dict.get(entry.source.service)!.has(entry.target.service)) {
+        let edge = new Edge(entry.source.service, entry.target.service);
+        edge_dict.get(entry.source.service)!.set(entry.target.service, edge);
+        return edge;
+    }else {
+        return edge_dict.get(entry.source.service)!.get(entry.target.service);
+    }
+}
\ No newline at end of file
@@ -0,0 +1,85 @@
+import {RankingAlgorithm} from "./rankingAlgorithm";
+
+import {Edge} from "./types/types";
+import * as fs from "fs";
+import * as readline from "readline";
+import {fillEdgeDictionary, readInteractionGraph, readSummary} from "./graphInput";
+
+// Long-living counterpart of app.js: reads one run per line from stdin as JSON
+//   {"strategy": <strategyID>, "graph": <graph.json>, "summary": <summary.json>, "result": <benchmark_file>, "log": <log_file>}
+// and answers every run with a single JSON line on stdout containing the same timings app.js writes to the benchmark
+// file (only written if "result" is given). The last graph and summary are kept in memory, consecutive runs on the
+// same graph only pay for building the edge dictionary (setupDuration) but not for reading and parsing the input
+// files again.
+
+let algorithm = new RankingAlgorithm();
+
+let cached_graph_path = "";
+let cached_graph: any = null;
+let cached_summary_path = "";
+let cached_endpoints: any = null;
+
+function runStrategy(run: any): any {
+    let strategyID = parseInt(run.strategy) % 12;
+    let edge_dict = new Map<string, Map<string, Edge>>();
+
+    let cpuStart = process.cpuUsage();
+    let startOverall = Date.now();
+    if (cached_graph_path !== run.graph) {
+        cached_graph = readInteractionGraph(run.graph);
+        cached_graph_path = run.graph;
+    }
+    if (cached_summary_path !== run.summary) {
+        cached_endpoints = readSummary(run.summary).endpoints;
+        cached_summary_path = run.summary;
+    }
+    fillEdgeDictionary(edge_dict, cached_graph);
+    let endPrepare = Date.now();
+
+    algorithm.strategy = strategyID;
+
+    let startTime = Date.now();
+    let result = algorithm.rank(edge_dict, cached_endpoints, "target");
+    let endTime = Date.now();
+    let cpu = process.cpuUsage(cpuStart);
+
+    let preparation = endPrepare - startOverall;
+    let runtime = endTime - startTime;
+    let overall = endTime - startOverall;
+
+    if (run.log) {
+        fs.writeFileSync(run.log, JSON.stringify(result.slice(0,10)), {flag: 'a'});
+    }
+    if (run.result) {
+        fs.writeFileSync(run.result, strategyID + "," + endTime + "," + startTime + "," + runtime + "," + startOverall + "," + preparation + "," + overall + "," + run.graph + "\n", {flag: 'a'});
+    }
+
+    return {
+        strategyID: strategyID,
+        endTime: endTime,
+        algorithmStartTime: startTime,
+        algorithmDuration: runtime,
+        startTime: startOverall,
+        setupDuration: preparation,
+        duration: overall,
+        path: run.graph,
+        cpuUser: cpu.user,
+        cpuSystem: cpu.system
+    };
+}
+
+let input = readline.createInterface({input: process.stdin, terminal: false});
+
+input.on('line', (line: string) => {
+    if (line.trim().length === 0) {
+        return;
+    }
+
+    let response: any;
+    try {
+        response = runStrategy(JSON.parse(line));
+    } catch (e) {
+        response = {error: String(e)};
+    }
+    process.stdout.write(JSON.stringify(response) + "\n");
+});
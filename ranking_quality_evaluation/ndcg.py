@@ -1,11 +1,63 @@
 import sys
 import csv
+import json
 import math
 import os
+import re
+from collections import namedtuple
+from multiprocessing import Pool
+
+# common.py is located in the root folder of the repository
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+import common
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# discounts log2(idx + 2) of the batch API, grown on demand
+discount_table = []
+
+# metrics written to results_metrics.csv (long format, one line per metric), see METRICS. Entries rated at least
+# relevance_threshold count as relevant for precision, average precision and reciprocal rank
+metrics = ['ndcg', 'precision', 'average_precision', 'reciprocal_rank', 'kendall_tau']
+relevance_threshold = 3
+
+# single entry of a ranking: change (source and target), score, severity level, change type and its details
+RankingEntry = namedtuple('RankingEntry', ['source', 'target', 'score', 'level', 'change', 'details'])
+
+# a strategy block of a ranking file, from its "strategy :" header to the "--" terminator
+RANKING_BLOCK = re.compile(rb"^strategy.*?^--[^\n]*", re.MULTILINE | re.DOTALL)
+
+# offsets of the strategy blocks of a ranking file are kept in memory. With index_dir set they are also cached across
+# runs as files in that folder (e.g. next to the results), the folders of the ranking files are never written
+index_dir = None
+INDEX_SUFFIX = ".idx"
+ranking_indexes = {}
+
+# sensitivity analysis (python ndcg.py relevance sensitivity <perturbations> [cutoffs], requires numpy): 'random' changes
+# every rating by +-1 with perturbation_probability, 'systematic' changes a single rating by +-1 per perturbation (all
+# possible ones, the number of perturbations is ignored). Ratings stay between 0 and 4
+perturbation_mode = 'random'
+perturbation_probability = 0.2
+perturbation_seed = 2019
+sensitivity_processes = os.cpu_count()
+sensitivity_chunk = 250  # perturbations scored at once by a worker
+
+# rankings of all scenarios in the sensitivity analysis, loaded once per worker process
+sensitivity_scenarios = []
+
+SETTINGS = ['metrics', 'relevance_threshold', 'perturbation_mode', 'perturbation_probability', 'perturbation_seed',
+            'sensitivity_processes', 'sensitivity_chunk', 'index_dir']
+
+DEFAULT_CUTOFFS = [3, 5, 7, 10]
 
 
 def main():
-    if len(sys.argv) != 2:
+    if len(sys.argv) < 2:
         return
 
     relevance_container = sys.argv[1]
@@ -13,30 +65,202 @@ def main():
     if not os.path.isdir(relevance_container):
         return
 
-    step_sizes = [3, 5, 7, 10]
-    relevance_files = [f for f in os.listdir(relevance_container) if os.path.isfile(os.path.join(relevance_container, f))]
+    if len(sys.argv) in (4, 5) and sys.argv[2] == "sensitivity":
+        cutoffs = parse_cutoffs(sys.argv[4]) if len(sys.argv) == 5 else DEFAULT_CUTOFFS
+        sensitivity(relevance_container, int(sys.argv[3]), cutoffs=cutoffs)
+        return
+    if len(sys.argv) > 3:
+        return
 
-    with open("results_ndcg.csv","w") as out:
-        out.write("scenario,variant,n,penalty,weight,strategy,ndcg\n")
-        for relevance_file in relevance_files:
-            folder = relevance_file.split("_")[0]
-            if os.path.isdir(folder):
-                scenario = os.path.splitext(relevance_file)[0]
-                for n in step_sizes:
-                    for candidate in os.listdir(folder):
-                        if os.path.isfile(os.path.join(folder, candidate)) and candidate.startswith(scenario):
-                            handle_scenario(os.path.join(relevance_container, relevance_file),
-                                            os.path.join(folder, candidate),
-                                            n,
-                                            out)
-
-
-def handle_scenario(relevance_path, source_path, n, out=sys.stdout):
+    # optional cutoffs, e.g. "3,5,7,10" or "1-100"
+    score(relevance_container, cutoffs=parse_cutoffs(sys.argv[2]) if len(sys.argv) == 3 else DEFAULT_CUTOFFS)
+
+
+def score(relevance_dir, ranking_dirs=None, cutoffs=DEFAULT_CUTOFFS, config=None, out_file="results_ndcg.csv",
+          metrics_file="results_metrics.csv"):
+    # scores all rankings of the scenarios in relevance_dir. Rankings are looked up in the directories named after the
+    # scenario (e.g. 'running' for 'running_basic.csv'), in the working directory or among ranking_dirs. config
+    # overrides settings above (e.g. {'relevance_threshold': 4}) for this call only
+    previous = apply_settings(config or {})
+    try:
+        with open(out_file, "w") as out, open(metrics_file, "w") as metrics_out:
+            out.write("scenario,variant,n,penalty,weight,strategy,ndcg\n")
+            metrics_out.write("scenario,variant,n,penalty,weight,strategy,metric,value\n")
+            for relevance_path, candidates in get_scenarios(relevance_dir, ranking_dirs):
+                handle_scenario(relevance_path, candidates, cutoffs, out, metrics_out)
+    finally:
+        apply_settings(previous)
+
+
+def sensitivity(relevance_dir, perturbations, ranking_dirs=None, cutoffs=DEFAULT_CUTOFFS, config=None,
+                out_file="results_sensitivity.csv"):
+    # distribution of scores of all rankings over perturbed relevance ratings, see score
+    previous = apply_settings(config or {})
+    try:
+        run_sensitivity(get_scenarios(relevance_dir, ranking_dirs), perturbations, cutoffs, out_file)
+    finally:
+        apply_settings(previous)
+
+
+def apply_settings(config):
+    return common.apply_settings(globals(), SETTINGS, config)
+
+
+def get_scenarios(relevance_container, ranking_dirs=None):
+    # relevance file and ranking files of every scenario
+    scenarios = []
+    relevance_files = [f for f in os.listdir(relevance_container) if os.path.isfile(os.path.join(relevance_container, f))]
+    ranking_folders = {os.path.basename(os.path.normpath(folder)): folder for folder in ranking_dirs or []}
+
+    for relevance_file in relevance_files:
+        folder = relevance_file.split("_")[0]
+        folder = ranking_folders.get(folder, "") if ranking_dirs else folder
+        if os.path.isdir(folder):
+            scenario = os.path.splitext(relevance_file)[0]
+            candidates = [os.path.join(folder, candidate) for candidate in os.listdir(folder)
+                          if os.path.isfile(os.path.join(folder, candidate)) and candidate.startswith(scenario)
+                          and not candidate.endswith(INDEX_SUFFIX)]
+            scenarios.append((os.path.join(relevance_container, relevance_file), candidates))
+
+    return scenarios
+
+
+def parse_cutoffs(value):
+    cutoffs = []
+    for part in value.split(","):
+        if "-" in part:
+            start, end = part.split("-")
+            cutoffs.extend(range(int(start), int(end) + 1))
+        else:
+            cutoffs.append(int(part))
+    return cutoffs
+
+
+def handle_scenario(relevance_path, source_paths, step_sizes, out=sys.stdout, metrics_out=None):
+    # every file is read and every ranking evaluated only once, the evaluation answers all metrics and cutoffs
     relevance_dict = read_relevance(relevance_path)
-    ranking_dict = process_ranking_file(source_path)
+    ideal = {'dcg': compute_dcg_prefix(get_ideal_ranking(relevance_dict), relevance_dict),
+             'relevant': sum(int(rating) >= relevance_threshold for target_dict in relevance_dict.values()
+                             for rating in target_dict.values())}
+
+    rankings = []
+    for source_path in source_paths:
+        ranking_dict = process_ranking_file(source_path)
+        evaluations = {strategy: evaluate_ranking(ranking, relevance_dict) for strategy, ranking in ranking_dict.items()}
+        rankings.append(get_ranking_details(source_path) + (evaluations,))
+
+    for n in step_sizes:
+        for scenario, variant, penaltyWeight, weightVariant, evaluations in rankings:
+            for strategy, evaluation in evaluations.items():
+                out.write("%s,%s,%d,%d,%s,%s,%f\n" % (scenario, variant, n, penaltyWeight, weightVariant, strategy, get_ndcg(evaluation, ideal, n)))
+                if metrics_out:
+                    for metric in metrics:
+                        metrics_out.write("%s,%s,%d,%d,%s,%s,%s,%f\n" % (scenario, variant, n, penaltyWeight, weightVariant, strategy, metric, METRICS[metric](evaluation, ideal, n)))
+
+
+def evaluate_ranking(ranking, relevance):
+    # all a metric needs to know about a ranking: DCG prefix sums, scores and ratings of its entries, groups of
+    # consecutive tied entries [start, size, relevant entries] and expected relevant entries among the first m entries
+    ratings = [int(relevance[entry[0]][entry[1]]) for entry in ranking]
+    ties = []
+    hits = [0]
+
+    for idx, entry in enumerate(ranking):
+        if idx > 0 and ranking[idx - 1][2] == entry[2]:
+            ties[-1][1] += 1
+        else:
+            ties.append([idx, 1, 0])
+        if ratings[idx] >= relevance_threshold:
+            ties[-1][2] += 1
+
+    for start, size, relevant in ties:
+        for _ in range(0, size):
+            hits.append(hits[-1] + relevant / size)
+
+    return {'dcg': compute_dcg_prefix(ranking, relevance), 'scores': [entry[2] for entry in ranking],
+            'ratings': ratings, 'ties': ties, 'hits': hits}
+
 
-    ideal_dcg = compute_dcg(get_ideal_ranking(relevance_dict), relevance_dict, n)
+# tie-aware metrics (expected values over all orders of tied entries, as in the nDCG reference), for the first n
+# entries of a ranking (all for n = 0)
 
+def get_ndcg(evaluation, ideal, n=0):
+    return get_dcg(evaluation['dcg'], n) / get_dcg(ideal['dcg'], n)
+
+
+def get_precision(evaluation, ideal, n=0):
+    length = len(evaluation['ratings'])
+    m = length if n == 0 else min(n, length)
+    k = length if n == 0 else n
+    return evaluation['hits'][m] / k if k > 0 else math.nan
+
+
+def get_average_precision(evaluation, ideal, n=0):
+    limit = len(evaluation['ratings']) if n == 0 else n
+    total = ideal['relevant'] if n == 0 else min(ideal['relevant'], n)
+    if total == 0:
+        return math.nan
+
+    precision_sum = 0
+    previous = 0
+    for start, size, relevant in evaluation['ties']:
+        if start >= limit:
+            break
+        for j in range(1, min(size, limit - start) + 1):
+            # precision at position start + j if it holds a relevant entry (probability relevant / size), the other
+            # j - 1 tied entries in front of it are relevant with probability (relevant - 1) / (size - 1)
+            tied_in_front = (j - 1) * (relevant - 1) / (size - 1) if size > 1 else 0
+            precision_sum += relevant / size * (previous + 1 + tied_in_front) / (start + j)
+        previous += relevant
+
+    return precision_sum / total
+
+
+def get_reciprocal_rank(evaluation, ideal, n=0):
+    limit = len(evaluation['ratings']) if n == 0 else n
+
+    for start, size, relevant in evaluation['ties']:
+        if start >= limit:
+            break
+        if relevant > 0:
+            # the first relevant entry is the j-th of the tied entries with probability C(size - j, relevant - 1) / C(size, relevant)
+            return sum(math.comb(size - j, relevant - 1) / math.comb(size, relevant) / (start + j)
+                       for j in range(1, min(size, limit - start) + 1))
+
+    return 0.0
+
+
+def get_kendall_tau(evaluation, ideal, n=0):
+    # tau-b between scores and ratings, i.e. agreement with the order of the ideal ranking
+    scores, ratings = evaluation['scores'], evaluation['ratings']
+    m = len(ratings) if n == 0 else min(n, len(ratings))
+
+    concordant = discordant = score_ties = rating_ties = 0
+    for i in range(0, m):
+        for j in range(i + 1, m):
+            agreement = (scores[i] - scores[j]) * (ratings[i] - ratings[j])
+            if agreement > 0:
+                concordant += 1
+            elif agreement < 0:
+                discordant += 1
+            score_ties += scores[i] == scores[j]
+            rating_ties += ratings[i] == ratings[j]
+
+    pairs = m * (m - 1) // 2
+    denominator = math.sqrt((pairs - score_ties) * (pairs - rating_ties))
+    return (concordant - discordant) / denominator if denominator > 0 else math.nan
+
+
+METRICS = {
+    'ndcg': get_ndcg,
+    'precision': get_precision,
+    'average_precision': get_average_precision,
+    'reciprocal_rank': get_reciprocal_rank,
+    'kendall_tau': get_kendall_tau
+}
+
+
+def get_ranking_details(source_path):
     # scenario = os.path.splitext(os.path.basename(relevance_path))[0]
     temp = os.path.splitext(os.path.basename(source_path))[0].split("_")
     scenario = temp[0]
@@ -44,8 +268,112 @@ def handle_scenario(relevance_path, source_path, n, out=sys.stdout):
     penaltyWeight = int(temp[3][3:])
     weightVariant = temp[2]
 
-    for strategy in ranking_dict:
-        out.write("%s,%s,%d,%d,%s,%s,%f\n" % (scenario, variant, n, penaltyWeight, weightVariant, strategy, compute_ndcg(ranking_dict[strategy], relevance_dict, ideal_dcg, n)))
+    return scenario, variant, penaltyWeight, weightVariant
+
+
+def run_sensitivity(scenarios, perturbations, cutoffs, out_file):
+    if perturbation_mode == 'random' and perturbations < 1:
+        raise ValueError(f"at least one perturbation is required, got {perturbations}")
+
+    settings = {name: globals()[name] for name in SETTINGS}
+    init_sensitivity_worker(scenarios, settings)
+
+    tasks = []
+    for idx, (details, ratings, scores, entries, tie_groups) in enumerate(sensitivity_scenarios):
+        count = len(get_systematic_changes(ratings)) if perturbation_mode == 'systematic' else perturbations
+        tasks.extend((idx, start, min(sensitivity_chunk, count - start), cutoffs)
+                     for start in range(0, count, sensitivity_chunk))
+
+    # every worker parses all rankings once, tasks only carry the scenario and range of perturbations to score
+    if sensitivity_processes > 1:
+        with Pool(sensitivity_processes, initializer=init_sensitivity_worker, initargs=(scenarios, settings)) as pool:
+            results = pool.starmap(score_perturbations, tasks)
+    else:
+        results = [score_perturbations(*task) for task in tasks]
+
+    with open(out_file, "w") as out:
+        out.write("scenario,variant,n,penalty,weight,strategy,ndcg,perturbations,mean,std,min,p5,median,p95,max\n")
+        for idx, (details, ratings, scores, entries, tie_groups) in enumerate(sensitivity_scenarios):
+            # perturbations x rankings x cutoffs, a scenario without ratings has no systematic perturbations
+            scenario_results = [result for task, result in zip(tasks, results) if task[0] == idx]
+            if not scenario_results:
+                continue
+            ndcg = numpy.concatenate(scenario_results)
+            original = score_ratings(ratings[None, :], scores, entries, tie_groups, cutoffs)[0]
+            percentiles = numpy.percentile(ndcg, [5, 50, 95], axis=0)
+
+            for c, n in enumerate(cutoffs):
+                for row, (scenario, variant, penaltyWeight, weightVariant, strategy) in enumerate(details):
+                    values = ndcg[:, row, c]
+                    out.write("%s,%s,%d,%d,%s,%s,%f,%d,%f,%f,%f,%f,%f,%f,%f\n" % (
+                        scenario, variant, n, penaltyWeight, weightVariant, strategy, original[row, c], len(values),
+                        values.mean(), values.std(), values.min(), percentiles[0, row, c], percentiles[1, row, c],
+                        percentiles[2, row, c], values.max()))
+
+
+def init_sensitivity_worker(scenarios, settings):
+    global sensitivity_scenarios
+    # workers start with the settings of the calling process, also if they do not inherit them
+    apply_settings(settings)
+    sensitivity_scenarios = [load_sensitivity_scenario(relevance_path, candidates) for relevance_path, candidates in scenarios]
+
+
+def load_sensitivity_scenario(relevance_path, source_paths):
+    # ratings as flat array, ranking entries refer to them by index (0 for padding, rating 0)
+    relevance_dict = read_relevance(relevance_path)
+    index_dict = {}
+    ratings = []
+    for source, target_dict in relevance_dict.items():
+        index_dict[source] = {}
+        for target, relevance in target_dict.items():
+            ratings.append(int(relevance))
+            index_dict[source][target] = len(ratings)
+
+    details = []
+    rankings = []
+    for source_path in source_paths:
+        for strategy, ranking in process_ranking_file(source_path).items():
+            details.append(get_ranking_details(source_path) + (strategy,))
+            rankings.append(ranking)
+
+    scores, entries = get_ranking_arrays(rankings, index_dict)
+    return details, numpy.array(ratings), scores, entries, get_tie_groups(scores)
+
+
+def get_systematic_changes(ratings):
+    return [(idx, change) for idx in range(0, len(ratings)) for change in (-1, 1) if 0 <= ratings[idx] + change <= 4]
+
+
+def get_perturbations(idx, ratings, start, count):
+    perturbed = numpy.tile(ratings, (count, 1))
+    if perturbation_mode == 'systematic':
+        for row, (rating, change) in enumerate(get_systematic_changes(ratings)[start:start + count]):
+            perturbed[row, rating] += change
+        return perturbed
+
+    for row in range(0, count):
+        # seeded per perturbation, results do not depend on chunks or processes
+        rng = numpy.random.default_rng([perturbation_seed, idx, start + row])
+        changed = rng.random(len(ratings)) < perturbation_probability
+        perturbed[row] += changed * rng.choice([-1, 1], len(ratings))
+    return numpy.clip(perturbed, 0, 4)
+
+
+def score_perturbations(idx, start, count, cutoffs):
+    details, ratings, scores, entries, tie_groups = sensitivity_scenarios[idx]
+    return score_ratings(get_perturbations(idx, ratings, start, count), scores, entries, tie_groups, cutoffs)
+
+
+def score_ratings(perturbed, scores, entries, tie_groups, cutoffs):
+    # nDCG of all rankings for every set of ratings (perturbations x rankings x cutoffs)
+    table = numpy.concatenate((numpy.zeros((len(perturbed), 1), dtype=perturbed.dtype), perturbed), axis=1)
+
+    dcg = compute_dcg_prefix_batch(scores, table[:, entries], tie_groups)
+    ideal = -numpy.sort(-perturbed, axis=1)
+    ideal_dcg = compute_dcg_prefix_batch(ideal, ideal)
+
+    return dcg[:, :, get_cutoff_columns(dcg.shape[2] - 1, cutoffs)] / \
+        ideal_dcg[:, get_cutoff_columns(ideal_dcg.shape[1] - 1, cutoffs)][:, None, :]
 
 
 def read_relevance(path):
@@ -64,28 +392,95 @@ def read_relevance(path):
 
 
 def process_ranking_file(path):
-    read_results = False
-    current_strategy = ""
-    ranking = []
+    return {strategy: block['ranking'] for strategy, block in read_ranking_file(path).items()}
 
-    ranking_dict = {}
 
-    with open(path, "r") as file:
-        for line in file:
-            if line.startswith("strategy") and not read_results:
-                # start reading a list of ranking entries
-                read_results = True
-                current_strategy = line.split(":")[1].strip()
-                ranking = []
-            elif read_results and line.startswith("--"):
-                # end reading a list of ranking entries
-                read_results = False
-                ranking_dict[current_strategy] = ranking
-            elif read_results and not line.startswith("#") and not line.startswith("runtime"):
-                # process a single ranking entry
-                ranking.append(line.split(",")[:3])
-
-    return ranking_dict
+def read_ranking_file(path):
+    # all strategies of a ranking file: {strategy: {'runtime': {...}, 'ranking': [RankingEntry, ...]}}
+    with open(path, "rb") as file:
+        data = file.read()
+
+    return dict(parse_ranking_block(match.group(), path, match.start()) for match in RANKING_BLOCK.finditer(data))
+
+
+def read_strategy(path, strategy):
+    # a single strategy of a ranking file, only its block is read (see read_ranking_index)
+    offset, length = read_ranking_index(path)[strategy]
+
+    with open(path, "rb") as file:
+        file.seek(offset)
+        return parse_ranking_block(file.read(length), path, offset)[1]
+
+
+def read_ranking_index(path):
+    # offset and length of every strategy block, rebuilt if the ranking file changed since the index was created
+    stat = os.stat(path)
+    index = ranking_indexes.get(path)
+    index_path = get_index_path(path)
+    if index is None and index_path:
+        try:
+            with open(index_path, "r") as file:
+                index = json.load(file)
+        except (OSError, ValueError):
+            pass
+    try:
+        if index['size'] == stat.st_size and index['mtime'] == stat.st_mtime_ns:
+            ranking_indexes[path] = index
+            return index['blocks']
+    except (TypeError, KeyError):
+        pass
+
+    with open(path, "rb") as file:
+        data = file.read()
+
+    blocks = {}
+    for match in RANKING_BLOCK.finditer(data):
+        strategy = data[match.start():data.index(b"\n", match.start())].decode().split(":")[1].strip()
+        blocks[strategy] = [match.start(), match.end() - match.start()]
+
+    index = ranking_indexes[path] = {'size': stat.st_size, 'mtime': stat.st_mtime_ns, 'blocks': blocks}
+    if index_path:
+        os.makedirs(index_dir, exist_ok=True)
+        with open(index_path, "w") as file:
+            json.dump(index, file)
+
+    return blocks
+
+
+def get_index_path(path):
+    # index file of a ranking file in index_dir, named by the absolute path of the ranking file
+    if not index_dir:
+        return None
+    return os.path.join(index_dir, os.path.abspath(path).strip(os.sep).replace(os.sep, "_") + INDEX_SUFFIX)
+
+
+def parse_ranking_block(block, path, offset):
+    # a strategy block found at offset of the ranking file at path, both are reported for malformed entries
+    lines = block.splitlines(keepends=True)
+    strategy = lines[0].decode().split(":")[1].strip()
+    runtime = {}
+    ranking = []
+
+    position = offset + len(lines[0])
+    for raw_line in lines[1:-1]:
+        line = raw_line.decode().rstrip("\r\n")
+        if line.startswith("runtime"):
+            runtime = json.loads(line.split(":", 1)[1])
+        elif line and not line.startswith("#"):
+            # source, target, score, level, change type, details
+            fields = line.split(",", 5)
+            if len(fields) != 6:
+                raise ValueError(f"ranking entry at offset {position} of '{path}' has {len(fields)} instead of 6 "
+                                 f"fields (source, target, score, level, change, details): {line!r}")
+            source, target, score, level, change, details = fields
+            try:
+                ranking.append(RankingEntry(source, target, float(score), int(level), change, details))
+            except ValueError as error:
+                raise ValueError(f"ranking entry at offset {position} of '{path}' is malformed ({error}): "
+                                 f"{line!r}") from None
+        position += len(raw_line)
+
+    return strategy, {'runtime': runtime, 'ranking': ranking}
 
 
 def compute_ndcg(ranking, relevance, ideal_dcg, n=0):
@@ -93,12 +488,20 @@ def compute_ndcg(ranking, relevance, ideal_dcg, n=0):
 
 
 def compute_dcg(ranking, relevance, n=0):
-    dcg = 0
+    return get_dcg(compute_dcg_prefix(ranking, relevance), n)
 
+
+def get_dcg(dcg_prefix, n=0):
+    # DCG of the first n entries (all for n = 0) from the prefix sums of a ranking
     if n == 0:
-        m = len(ranking)
-    else:
-        m = min(n, len(ranking))
+        return dcg_prefix[-1]
+    return dcg_prefix[min(n, len(dcg_prefix) - 1)]
+
+
+def compute_dcg_prefix(ranking, relevance):
+    # dcg_prefix[m] is the DCG of the first m entries
+    dcg = 0
+    dcg_prefix = [dcg]
 
     score_dict = {}
     entry_score_dict = {}
@@ -114,19 +517,92 @@ def compute_dcg(ranking, relevance, n=0):
         score_dict[score] += 1
         entry_score_dict[score].append(int(relevance[entry[0]][entry[1]]))
 
-    for idx in range(0, m):
-        score = ranking[idx][2]
-        rel = sum(entry_score_dict[score])/score_dict[score]
+    # average relevance of each group of tied entries
+    tie_relevance = {score: sum(entry_score_dict[score])/score_dict[score] for score in score_dict}
+
+    for idx in range(0, len(ranking)):
+        rel = tie_relevance[ranking[idx][2]]
         dcg += rel / math.log2(idx + 2)
+        dcg_prefix.append(dcg)
 
     # for idx in range(0, m):
     #     (rank, entry) = processed_ranking[idx]
     #     rel = int(relevance[entry[0]][entry[1]])
     #     sum += rel / math.log2(rank + 1)
 
+    return dcg_prefix
+
+
+def get_ranking_arrays(rankings, relevance):
+    # parsed rankings as score and relevance arrays (rankings x entries) for the batch API, shorter rankings are padded
+    # with NaN scores and relevance 0
+    length = max((len(ranking) for ranking in rankings), default=0)
+    scores = numpy.full((len(rankings), length), numpy.nan)
+    relevances = numpy.zeros((len(rankings), length), dtype=numpy.int64)
+
+    for row, ranking in enumerate(rankings):
+        scores[row, :len(ranking)] = [float(entry[2]) for entry in ranking]
+        relevances[row, :len(ranking)] = [int(relevance[entry[0]][entry[1]]) for entry in ranking]
+
+    return scores, relevances
+
+
+def get_discounts(length):
+    global discount_table
+    if len(discount_table) < length:
+        # math.log2 as in compute_dcg, results of both are identical
+        discount_table = numpy.array([math.log2(idx + 2) for idx in range(max(length, 2 * len(discount_table)))])
+    return discount_table[:length]
+
+
+def get_tie_groups(scores):
+    # tied entries of every ranking: order of all entries by ranking and score (entries keep their ranking order within
+    # a group), start and size of every group in this order
+    rows, length = scores.shape
+    order = numpy.lexsort((scores.ravel(), numpy.repeat(numpy.arange(rows), length)))
+    sorted_scores = scores.ravel()[order]
+    sorted_rows = order // length
+    starts = numpy.flatnonzero(numpy.concatenate(([True], (sorted_scores[1:] != sorted_scores[:-1]) |
+                                                          (sorted_rows[1:] != sorted_rows[:-1]))))
+    return order, starts, numpy.diff(numpy.append(starts, order.size))
+
+
+def compute_dcg_prefix_batch(scores, relevances, tie_groups=None):
+    # DCG prefix sums of many rankings at once, row r equals compute_dcg_prefix of ranking r (requires numpy).
+    # relevances can also hold several sets of relevance for the same rankings (sets x rankings x entries), ties are
+    # grouped only once then
+    scores = numpy.asarray(scores, dtype=numpy.float64)
+    relevances = numpy.asarray(relevances)
+    rows, length = scores.shape
+    sets = relevances.shape[:-2]
+    dcg = numpy.zeros(sets + (rows, length + 1))
+    if scores.size == 0:
+        return dcg
+
+    order, starts, counts = tie_groups if tie_groups else get_tie_groups(scores)
+    entries = relevances.reshape(sets + (rows * length,))
+
+    # average relevance of each group of tied entries
+    tie_relevance = numpy.add.reduceat(entries[..., order], starts, axis=-1) / counts
+    gains = numpy.empty(entries.shape)
+    gains[..., order] = numpy.repeat(tie_relevance, counts, axis=-1)
+
+    numpy.cumsum(gains.reshape(sets + (rows, length)) / get_discounts(length), axis=-1, out=dcg[..., 1:])
     return dcg
 
 
+def compute_ndcg_batch(scores, relevances, ideal_dcg, cutoffs):
+    # nDCG of many rankings (rows) for every cutoff (columns, 0 for the whole ranking), ideal_dcg are the prefix sums
+    # of the ideal ranking
+    dcg = compute_dcg_prefix_batch(scores, relevances)
+    return dcg[:, get_cutoff_columns(dcg.shape[1] - 1, cutoffs)] / numpy.array([get_dcg(ideal_dcg, n) for n in cutoffs])
+
+
+def get_cutoff_columns(length, cutoffs):
+    # columns of DCG prefix sums for the given cutoffs, see get_dcg
+    return [length if n == 0 else min(n, length) for n in cutoffs]
+
+
 def get_ideal_ranking(relevance_dict):
     ranking = []
 